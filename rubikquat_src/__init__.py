@@ -1,7 +1,8 @@
 import sys
 import os
 
-from .rubikquat import RubikQuat
+# The application (pygame) is imported only when started, importing the package
+# or its core modules (rubik, rubikdef, facelet, cmdqueue, ...) doesn't load pygame
 
 def _real_main(argv=None):
     #print('__init__._real_main()')
@@ -20,7 +21,19 @@ def _real_main(argv=None):
         path = os.path.dirname(path)
         path = os.path.dirname(path)
 
-    m = RubikQuat(600, 600, path)
+    # optional argument: size of rubik (NxNxN), default 3
+    if(argv is None):
+        argv = sys.argv[1:]
+    size = 3
+    if(len(argv) > 0):
+        size = int(argv[0]) if(argv[0].isdigit()) else 0
+        if((size < 2) or (size > 20)):
+            print("usage: python -m rubikquat_src [size]", file=sys.stderr)
+            print("  size - size of rubik NxNxN, 2..20 (default 3)", file=sys.stderr)
+            sys.exit(2)
+
+    from .rubikquat import RubikQuat
+    m = RubikQuat(600, 600, path, size)
     m.run()
 
     retcode = 0
@@ -0,0 +1,150 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from collections import OrderedDict
+import numpy as np
+from . import facelet
+from .cmdqueue import flipCmdDefMap
+
+#------------------------------------------------------------------------------
+# Algorithm Library
+# Named sequences of flip commands (see cmdqueue.flipCmdList). Every algorithm
+# is composed once into a single permutation of stickers (see facelet.FaceletModel):
+#
+#       perm = moves[m0][moves[m1]][moves[m2]]...     stickers = stickers[perm]
+#
+# applying an algorithm to a state or to a batch of states is a single gather,
+# the commands are used only to animate it (CmdQueue.flipSeq).
+#
+# The permutations are kept in a bounded LRU cache: the least recently used
+# algorithm is dropped when the cache is full and composed again when needed.
+#------------------------------------------------------------------------------
+
+# Default algorithms (lowercase = clockwise, uppercase = counterclockwise)
+defaultAlgorithms = {'sexy':            'ruRU',             # R U R' U'
+                     'sledgehammer':    'RfrF',             # R' F R F'
+                     'sune':            'ruRuruuR',         # R U R' U R U2 R'
+                     'antisune':        'ruuRUrUR',         # R U2 R' U' R U' R'
+                     'tperm':           'ruRURfrrURUruRF',  # R U R' U' R' F R2 U' R' U' R U R' F'
+                     'flipAll':         'xxyy'}             # x2 y2 = z2: whole rubik upside down, left <--> right
+
+class AlgorithmLibrary:
+    """ Algorithm Library - named algorithms composed into permutations of stickers """
+
+    def __init__(self, model = None, cacheSize = 256):
+        """ Initialize library with the default algorithms
+            model - facelet model of rubik (default: 3x3x3)
+            cacheSize - count of permutations kept in cache """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.cacheSize = cacheSize
+        self.algorithms = {}
+        # name --> (perm, framePerm, frameAfter), see compose
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        for name, cmds in defaultAlgorithms.items():
+            self.register(name, cmds)
+
+    def register(self, name, cmds):
+        """ Add (or replace) an algorithm
+            cmds - sequence of flip commands (list or string) """
+        cmds = list(cmds)
+        for cmd in cmds:
+            if(cmd not in flipCmdDefMap):
+                raise ValueError(f"Unknown flip command '{cmd}' in algorithm '{name}'")
+        self.algorithms[name] = cmds
+        self.cache.pop(name, None)
+
+    def remove(self, name):
+        """ Remove an algorithm """
+        del self.algorithms[name]
+        self.cache.pop(name, None)
+
+    def names(self):
+        """ Return the names of all algorithms """
+        return list(self.algorithms)
+
+    def getCmds(self, name):
+        """ Return the flip commands of an algorithm (ex: to animate it) """
+        return list(self.algorithms[name])
+
+    def compose(self, cmds):
+        """ Return the permutations of a sequence of flip commands:
+            perm - permutation of stickers (all commands, also whole-cube rotations)
+            framePerm - (frames, stickers) the permutation for a framed state in every frame
+            frameAfter - (frames) the frame after the commands for a framed state in every frame """
+        model = self.model
+        moves = [model.moveIndex(flipCmdDefMap[cmd][0], flipCmdDefMap[cmd][1]) for cmd in cmds]
+        perm = np.arange(len(model.slots))
+        for move in moves:
+            perm = perm[model.moves[move]]
+
+        # Framed state (stickers, f): physical = stickers[frames[f]], after the algorithm
+        # the physical stickers are stickers[frames[f]][perm] = stickers'[frames[f']]
+        frames = len(model.frames)
+        frameAfter = np.arange(frames)
+        for move in moves:
+            if(model.isWhole[move]):
+                frameAfter = model.frameMul[frameAfter, move]
+        inv = np.argsort(model.frames, axis=1)
+        framePerm = np.take_along_axis(model.frames[:, perm], inv[frameAfter], axis=1)
+        return perm, framePerm, frameAfter
+
+    def get(self, name):
+        """ Return the cached permutations of an algorithm (see compose) """
+        entry = self.cache.get(name)
+        if(entry is not None):
+            self.hits += 1
+            self.cache.move_to_end(name)
+            return entry
+        self.misses += 1
+        entry = self.compose(self.algorithms[name])
+        self.cache[name] = entry
+        if(len(self.cache) > self.cacheSize):
+            self.cache.popitem(last=False)
+        return entry
+
+    def getPerm(self, name):
+        """ Return the permutation of stickers of an algorithm """
+        return self.get(name)[0]
+
+    def apply(self, name, stickers):
+        """ Apply an algorithm to stickers, return the new stickers """
+        return stickers[self.get(name)[0]]
+
+    def applyData(self, name, rubikData):
+        """ Apply an algorithm to a RubikData instance """
+        self.model.setState(rubikData, self.apply(name, self.model.getState(rubikData)))
+
+    def applyBatch(self, name, batch):
+        """ Apply an algorithm to all rubiks of a batch (see batch.RubikBatch) """
+        perm, framePerm, frameAfter = self.get(name)
+        if(batch.framed):
+            batch.states = np.take_along_axis(batch.states, framePerm[batch.frame], axis=1)
+            batch.frame = frameAfter[batch.frame]
+        else:
+            batch.states = batch.states[:, perm]
+
+#------------------------------------------------------------------------------
+# Libraries already created: size --> AlgorithmLibrary
+_libraries = {}
+
+def getLibrary(n = 3):
+    """ Return the algorithm library of a NxNxN rubik (see facelet.getModel) """
+    if(n not in _libraries):
+        _libraries[n] = AlgorithmLibrary(facelet.getModel(n))
+    return _libraries[n]
@@ -0,0 +1,132 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from math import gcd
+import numpy as np
+from . import facelet
+from .cmdqueue import flipCmdDefMap
+
+#------------------------------------------------------------------------------
+# Sequence Analysis
+# A sequence of flip commands (see cmdqueue.flipCmdList) is composed into one
+# permutation of stickers (see facelet.FaceletModel) and decomposed into the
+# cycles of cubelets it moves:
+#
+#       cycle (c0, c1, ..., cL-1): the cubelet at c1 goes to c0, c2 to c1, ...
+#
+# After L repetitions every cubelet of a cycle is back in its place, but it
+# can be turned (twist): an edge flipped (2), a corner twisted (3). The cycle
+# is solved after L * twist repetitions, the whole sequence after:
+#
+#       order = lcm(L0 * twist0, L1 * twist1, ...)
+#
+# ex: "r u" --> corners 5-cycle twisted (15), corner twisted in place (3),
+#     edges 7-cycle (7): order = lcm(15, 3, 7) = 105
+#------------------------------------------------------------------------------
+class Cycle:
+    """ Cycle - cubelets moved in a cycle by a sequence """
+
+    def __init__(self, cubelets, twist):
+        """ cubelets - indexes of cubelets (see rubikdef) in the order of cycle
+            twist - count of cycle turns to bring the cubelets back in the same orientation """
+        self.cubelets = cubelets
+        self.twist = twist
+
+    def order(self):
+        """ Return the count of repetitions which solves the cycle """
+        return len(self.cubelets) * self.twist
+
+    def __repr__(self):
+        return f"Cycle({self.cubelets}, twist={self.twist})"
+
+class SeqAnalyzer:
+    """ Sequence Analyzer - cycles and order of sequences of flip commands """
+
+    def __init__(self, model = None):
+        """ Initialize analyzer
+            model - facelet model of rubik (default: 3x3x3) """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        # Cubelet of every sticker and the stickers of every cubelet (cubelets with stickers only)
+        self.stickerCubelet = (model.slots // 6).tolist()
+        self.cubeletStickers = {}
+        for sticker, cubel in enumerate(self.stickerCubelet):
+            self.cubeletStickers.setdefault(cubel, []).append(sticker)
+
+    def compose(self, cmds):
+        """ Return the permutation of stickers of a sequence of flip commands """
+        model = self.model
+        perm = np.arange(len(model.slots))
+        for cmd in cmds:
+            perm = perm[model.moves[model.moveIndex(flipCmdDefMap[cmd][0], flipCmdDefMap[cmd][1])]]
+        return perm
+
+    def cycles(self, perm):
+        """ Return the list of cycles (Cycle) of a permutation of stickers,
+            the cubelets which are not moved and not turned are skipped """
+        perm = perm.tolist()
+        stickerCubelet = self.stickerCubelet
+        visited = set()
+        cycles = []
+        for cubel, stickers in self.cubeletStickers.items():
+            if(cubel in visited):
+                continue
+            # follow the cubelets: the cubelet at position c comes from the position of perm
+            cubelets = []
+            c = cubel
+            while(c not in visited):
+                visited.add(c)
+                cubelets.append(c)
+                c = stickerCubelet[perm[self.cubeletStickers[c][0]]]
+            # the permutation of stickers of cubelet after len(cubelets) repetitions
+            turned = []
+            for s in stickers:
+                for i in range(len(cubelets)):
+                    s = perm[s]
+                turned.append(s)
+            twist = 1
+            state = turned
+            while(state != stickers):
+                state = [turned[stickers.index(s)] for s in state]
+                twist += 1
+            if((len(cubelets) > 1) or (twist > 1)):
+                cycles.append(Cycle(cubelets, twist))
+        return cycles
+
+    def analyze(self, cmds):
+        """ Return the analysis of a sequence of flip commands as a tuple:
+            (order, cycles, affected cubelets) """
+        cycles = self.cycles(self.compose(cmds))
+        order = 1
+        for cycle in cycles:
+            n = cycle.order()
+            order = order * n // gcd(order, n)
+        affected = sorted(c for cycle in cycles for c in cycle.cubelets)
+        return order, cycles, affected
+
+    def order(self, cmds):
+        """ Return the count of repetitions of a sequence which brings the rubik back to its state """
+        return self.analyze(cmds)[0]
+
+#------------------------------------------------------------------------------
+# Analyzers already created: size --> SeqAnalyzer
+_analyzers = {}
+
+def getAnalyzer(n = 3):
+    """ Return the sequence analyzer of a NxNxN rubik (see facelet.getModel) """
+    if(n not in _analyzers):
+        _analyzers[n] = SeqAnalyzer(facelet.getModel(n))
+    return _analyzers[n]
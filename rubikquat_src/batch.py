@@ -0,0 +1,117 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import numpy as np
+from . import facelet
+
+#------------------------------------------------------------------------------
+# Rubik Batch
+# Simulation of M independent rubiks in one (M, stickers) uint8 array,
+# every row is the state of one rubik (see facelet.FaceletModel):
+#
+#                 |<-------- stickers -------->|
+#       rubik 0:  [ 2, 3, 5, 2, 5, 2, 4, 5, ... ]
+#       rubik 1:  [ 2, 3, 5, 2, 5, 2, 4, 5, ... ]
+#       ...
+#
+# A move (shared by all rubiks) or a vector of moves (one for every rubik)
+# is applied with a single fancy-index operation.
+#
+# Framed batch: the orientation of every rubik is tracked as a frame (see
+# facelet.FaceletModel), whole-cube rotations only update the frame.
+#------------------------------------------------------------------------------
+class RubikBatch:
+    """ Rubik Batch - simulation engine of many rubiks """
+
+    def __init__(self, count, model = None, framed = False):
+        """ Initialize batch, all rubiks are in the solved state
+            count - count of rubiks in batch
+            model - facelet model of rubiks (default: 3x3x3) 
+            framed - if True whole-cube rotations update only the frame of rubiks """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.count = count
+        # Moves permutations + the permutation of "no move" (used to pad sequences)
+        self.perm = np.vstack((model.moves, np.arange(len(model.slots))))
+        self.nop = len(model.moves)
+        self.states = np.empty((count, len(model.slots)), dtype=np.uint8)
+        # Frames of rubiks and the frame tables extended with "no move"
+        self.framed = framed
+        self.frame = np.zeros(count, dtype=np.intp)
+        self.isWhole = np.append(model.isWhole, False)
+        self.frameMul = np.hstack((model.frameMul, np.full((len(model.frames), 1), -1, dtype=np.intp)))
+        self.frameMove = np.hstack((model.frameMove, np.full((len(model.frames), 1), self.nop, dtype=np.intp)))
+        self.reset()
+
+    def reset(self):
+        """ Reset all rubiks to the solved state """
+        self.states[:] = self.model.solved
+        self.frame[:] = 0
+
+    def apply(self, moves):
+        """ Apply moves to rubiks
+            moves - one move applied to all rubiks or
+                    an array of moves, one for every rubik (self.nop = no move) """
+        moves = np.asarray(moves)
+        if(self.framed):
+            # whole-cube rotations change the frame, layer moves are remapped through the frame
+            moves = np.broadcast_to(moves, self.frame.shape)
+            whole = self.isWhole[moves]
+            layerMoves = np.where(whole, self.nop, self.frameMove[self.frame, moves])
+            self.frame = np.where(whole, self.frameMul[self.frame, moves], self.frame)
+            self.states = np.take_along_axis(self.states, self.perm[layerMoves], axis=1)
+        elif(moves.ndim == 0):
+            self.states = self.states[:, self.perm[moves]]
+        else:
+            self.states = np.take_along_axis(self.states, self.perm[moves], axis=1)
+
+    def applySeq(self, moves):
+        """ Apply sequences of moves to rubiks
+            moves - list of moves applied to all rubiks or
+                    (count, length) array, a sequence of moves for every rubik
+                    (shorter sequences padded with self.nop) """
+        moves = np.asarray(moves)
+        if(self.framed and (moves.ndim == 1)):
+            # every rubik has its own frame: apply the moves one by one
+            for move in moves:
+                self.apply(move)
+        elif(moves.ndim == 1):
+            # the same sequence for all rubiks: compose it into one permutation
+            perm = np.arange(self.perm.shape[1])
+            for move in moves:
+                perm = perm[self.perm[move]]
+            self.states = self.states[:, perm]
+        else:
+            for col in range(moves.shape[1]):
+                self.apply(moves[:, col])
+
+    def applyCmd(self, layer, direction):
+        """ Apply a flip command (layer, direction) to all rubiks (see cmdqueue.flipCmdDefMap) """
+        self.apply(self.model.moveIndex(layer, direction))
+
+    def isSolved(self):
+        """ Return a bool array: True for every rubik in the solved state """
+        s = self.states[:, self.model.faceGroups]
+        return (s == s[:, :, :1]).all(axis=(1, 2))
+
+    def getState(self, idx, rubikData):
+        """ Copy the state of rubik idx into a RubikData instance """
+        self.model.setState(rubikData, self.model.getPhysical(self.states[idx], self.frame[idx]))
+
+    def setState(self, idx, rubikData):
+        """ Copy the state of a RubikData instance into rubik idx """
+        self.states[idx] = self.model.getState(rubikData)
+        self.frame[idx] = 0
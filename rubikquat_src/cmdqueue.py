@@ -0,0 +1,150 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import random
+
+# List of all flip commands
+flipCmdList = ['f', 'F', 'u', 'U', 'l', 'L', 'r', 'R', 'y', 'Y', 'x', 'X', 'z', 'Z']
+
+# Map contains definitions (layer, direction, image) for every flip command
+#                 cmd   layer   dir.    img
+flipCmdDefMap = { 'f':  (0,     +1,     4),   # F
+                  'F':  (0,     -1,     11),  # F'
+                  'u':  (1,     +1,     5),   # U
+                  'l':  (2,     +1,     6),   # L
+                  'L':  (2,     -1,     13),  # L'
+                  'U':  (1,     -1,     12),  # U'
+                  'r':  (3,     -1,     7),   # R
+                  'R':  (3,     +1,     14),  # R'
+                  'y':  (4,     +1,     8),   # Y
+                  'Y':  (4,     -1,     15),  # Y'
+                  'x':  (5,     +1,     9),   # X
+                  'X':  (5,     -1,     16),  # X'
+                  'z':  (6,     +1,     10),  # Z
+                  'Z':  (6,     -1,     17)   # Z'
+                }
+
+class CmdQueue:
+    """ Command Queue - the list of flip commands with undo/redo (no display) """
+    
+    def __init__(self):
+    
+        # The list of flipping commands , where every element is a tuple: (flipLayer, flipDir, flipImg)
+        self.cmdList = []
+        self.cmdIdx = 0     # The current command index in the cmdList
+        self.cmdTop = 0     # Index of the top of the list
+        
+        # The list of undo commands , where every element is a tuple: (flipLayer, flipDir)
+        self.undList = []   # The undo-list: contains the commands for undo
+        self.undIdx = 0     # The current command index in the cmdList
+
+        # Sequence compiler applied to sequences of commands (see seqcomp.SeqCompiler, None = not compiled)
+        self.compiler = None
+    
+    def flip(self, flipCmd):
+        """ Add the command to flip a layer to command list
+        flipCmd - flip command: an entry in flipMan dictionary """
+        
+        # In case the top is already pointing to the end the list:
+        # just add the command at the end of list and move the top to the end
+        if(self.cmdTop >= len(self.cmdList)):
+            self.cmdList.append(flipCmdDefMap[flipCmd])
+            self.cmdTop = len(self.cmdList)
+        # Otherwise if top is not already pointing to the end of list (there are 'redo' commands):
+        # add the command to the top and remove the rest of the list (delete 'redo' command)
+        else:
+            self.cmdList[self.cmdTop] = flipCmdDefMap[flipCmd]
+            self.cmdList[self.cmdTop + 1 :] = []
+            self.cmdTop = len(self.cmdList)
+        #self.out()
+    
+    def flipSeq(self, flipCmds):
+        """ Add a sequence of flip commands to command list, the redundant commands
+        are removed first (if the queue has a sequence compiler)
+        flipCmds - list of flip commands: entries in flipMan dictionary """
+        if(self.compiler is not None):
+            flipCmds = self.compiler.compile(flipCmds)
+        for flipCmd in flipCmds:
+            self.flip(flipCmd)
+
+    def scramble(self, cnt):
+        """ Scramble Rubik 
+        cnt - count: how many times to flip (scramble) """
+        self.flipSeq([flipCmdList[random.randint(0, len(flipCmdList) - 1)] for i in range(cnt)])
+        #self.out()
+    
+    def getNextCmd(self):
+        """ Get the next command to be executed a tupple (flipLayer, flipDir), 
+        the first priority has the undo-list (if it is not empty) 
+        and after the commands list """
+        
+        # First check if undo list is not empty and retun next command from it
+        if(self.undIdx < len(self.undList)):
+            # Get next element from undo-list
+            retVal = self.undList[self.undIdx]
+            self.undIdx += 1
+            return retVal
+        
+        # Check if command list not empty and return next command from it
+        if((self.cmdIdx < self.cmdTop) and (self.cmdIdx < len(self.cmdList))):
+            retVal = self.cmdList[self.cmdIdx]
+            self.cmdIdx += 1
+            return retVal
+        
+        # No commands to execute
+        return None
+    
+    def pendingCount(self):
+        """ Return the count of commands waiting to be executed (undo and command list) """
+        return (len(self.undList) - self.undIdx) + max(0, min(self.cmdTop, len(self.cmdList)) - self.cmdIdx)
+    
+    def peekNextCmd(self):
+        """ Return the next command to be executed (see getNextCmd) without removing it,
+        or None if there are no commands to execute """
+        if(self.undIdx < len(self.undList)):
+            return self.undList[self.undIdx]
+        if((self.cmdIdx < self.cmdTop) and (self.cmdIdx < len(self.cmdList))):
+            return self.cmdList[self.cmdIdx]
+        return None
+    
+    def undo(self):
+        """ Undo the last movie """
+        # Check if cmd list not empty
+        if((self.cmdTop > 0) and (len(self.cmdList) > 0)):
+            # Get element from top position and decrement top and index
+            self.cmdTop -= 1
+            (flipLayer, flipIdx, flipImg) = self.cmdList[self.cmdTop]
+            if(self.cmdIdx > self.cmdTop):
+                self.cmdIdx = self.cmdTop
+            # Add element to undo-list (but inverse the direction)
+            self.undList.append((flipLayer, -flipIdx))
+            #self.out()
+        pass
+    
+    def redo(self):
+        """ Redo the move after an 'undo' operation """
+        # Check if there are command between top index and end of the list
+        # and increase the top pointer, getNextCmd will execute the command
+        if(self.cmdTop < len(self.cmdList)):
+            self.cmdTop += 1
+    
+    def out(self):
+        """ Display commands and history """
+        print("cmd: len=", len(self.cmdList), " top=", self.cmdTop, " idx=", self.cmdIdx)
+        for idx,cmd in enumerate(self.cmdList):
+            print(idx, cmd)
+        print("undo: len=", len(self.undList), " idx=", self.undIdx)
+        for idx,cmd in enumerate(self.undList):
+            print(idx, cmd)
@@ -13,7 +13,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
-import pygame
+import numpy as np
 from . import rutils
 
 #-------------------------------------------------------------------------------
@@ -34,7 +34,8 @@ from . import rutils
 #                                        B bottom 
 #-------------------------------------------------------------------------------
 class CubeletFace:
-    def __init__(self, nodes):
+    def __init__(self, idx, nodes):
+        self.idx = idx          # index of face [F,T,L,R,K,B] (index in cubelet's faceColor)
         self.nodes = nodes      # list of nodes which make this face (ex: [0,1,2,3])
         self.visible = False    # indicates if face is visible or not
         self.centerZ = 0.0      # Z coordinate of face's center (used to detect if face is visible)
@@ -60,35 +61,53 @@ class Cubelet:
                 (0xff, 0x81, 0x16), # 5-Orange
                 (255,255,255)]      # 6-White
 
-    def __init__(self, coordinates, facesDef, width):
+    # Count of rows used by a cubelet in the vertex buffer: 8 nodes + 1 center
+    rowCount = 9
+
+    def __init__(self, coordinates, facesDef, width, buf0 = None, buf1 = None, colorOnly = False):
         """ Initialize a cube:
             coordinates - tuple (X,Y,Z) coordinate of cubelet's center
             facesDef - list [F,T,L,R,K,B] color definition for every face of the cube 
                         (values in the list are index in faceType list)
-            width - cubelet's width in pixels """
+            width - cubelet's width in pixels
+            buf0, buf1 - optional (9, 3) vertex buffers (rows 0..7 = nodes, row 8 = center)
+                        for init position 0 and after rotation. When defined, the cubelet 
+                        uses them as views (ex: slices of the RubikExt vertex buffer)
+            colorOnly - if True only the faces with color are created (faces without color
+                        are inside of rubik, they are hidden by other cubelets) """
 
+        # allocate own vertex buffers if not provided
+        if(buf0 is None):
+            buf0 = np.empty((self.rowCount, 3))
+        if(buf1 is None):
+            buf1 = np.empty((self.rowCount, 3))
+        self.buf0 = buf0
+        self.buf1 = buf1
         # set center coordinates
         x, y, z = coordinates
-        self.center0 = coordinates  # cubelet's center in init position 0
-        self.center1 = coordinates  # cubelet's center after rotation
+        self.buf0[8] = coordinates
+        self.center0 = self.buf0[8]     # cubelet's center in init position 0
+        self.center1 = self.buf1[8]     # cubelet's center after rotation
         # set faces colors
         self.faceColor = facesDef
         # add nodes
         hw = width / 2
-        self.nodes0 = []
-        self.nodes0.append((x - hw, y + hw, z - hw)) #0
-        self.nodes0.append((x - hw, y - hw, z - hw)) #1
-        self.nodes0.append((x + hw, y - hw, z - hw)) #2
-        self.nodes0.append((x + hw, y + hw, z - hw)) #3
-        self.nodes0.append((x - hw, y + hw, z + hw)) #4
-        self.nodes0.append((x - hw, y - hw, z + hw)) #5
-        self.nodes0.append((x + hw, y - hw, z + hw)) #6
-        self.nodes0.append((x + hw, y + hw, z + hw)) #7
-        self.nodes1 = self.nodes0.copy()
+        self.nodes0 = self.buf0[0:8]
+        self.nodes0[0] = (x - hw, y + hw, z - hw) #0
+        self.nodes0[1] = (x - hw, y - hw, z - hw) #1
+        self.nodes0[2] = (x + hw, y - hw, z - hw) #2
+        self.nodes0[3] = (x + hw, y + hw, z - hw) #3
+        self.nodes0[4] = (x - hw, y + hw, z + hw) #4
+        self.nodes0[5] = (x - hw, y - hw, z + hw) #5
+        self.nodes0[6] = (x + hw, y - hw, z + hw) #6
+        self.nodes0[7] = (x + hw, y + hw, z + hw) #7
+        self.nodes1 = self.buf1[0:8]
+        self.init0()
         # add faces
         self.faces = []
-        for fNodes in self.faceNodes:
-            self.faces.append(CubeletFace(fNodes))    # 0-Front
+        for idx, fNodes in enumerate(self.faceNodes):
+            if((not colorOnly) or (facesDef[idx] != 0)):
+                self.faces.append(CubeletFace(idx, fNodes))
         self.updateFaces()
 
     def updateFaces(self):
@@ -103,33 +122,35 @@ class Cubelet:
 
     def init0(self):
         """ Initialize cubelet's coordinates to init position 0 """
-        self.nodes1 = self.nodes0.copy()
-        self.center1 = self.center0
+        self.buf1[:] = self.buf0
 
     def rotate(self, q):
         """ Rotate cubelet with a degree in reference to center """
-        for idx,node in enumerate(self.nodes1):
-            self.nodes1[idx] = q * node
-        # rotate cube center
-        self.center1 = q * self.center1
+        # rotate nodes and cube center (row 8) with one matrix multiplication
+        self.buf1[:] = self.buf1 @ q.get_matrix().T
         
-    def draw(self, surface, offset):
-        """ Draw cubelet's faces on surface """
-        for idx, face in enumerate(self.faces):
-            if(face.visible):
+    def draw(self, surface, offset, visible = None):
+        """ Draw cubelet's faces on surface 
+            visible - optional visibility of faces [F,T,L,R,K,B] (used instead of face.visible,
+                      see RubikSetDraw.updateView) """
+        # Rendering layer: pygame is loaded only when drawing
+        import pygame
+        for face in self.faces:
+            if(face.visible if(visible is None) else visible[face.idx]):
                 temp = []
                 for node in face.nodes:
                     temp.append((offset[0] + self.nodes1[node][0], offset[1] + self.nodes1[node][1]))
-                pygame.draw.polygon(surface, self.faceType[self.faceColor[idx]], temp, 0)
+                pygame.draw.polygon(surface, self.faceType[self.faceColor[face.idx]], temp, 0)
                 if(face.selected):
                     pygame.draw.line(surface, (200, 200, 200), temp[0], temp[2])
                     pygame.draw.line(surface, (200, 200, 200), temp[1], temp[3])
     
-    def isInsideXY(self, xyPos):
-        """ Check if a point (xyPos) is inside of a cubelet (ignore Z-axis) """
+    def isInsideXY(self, xyPos, visible = None):
+        """ Check if a point (xyPos) is inside of a cubelet (ignore Z-axis) 
+            visible - optional visibility of faces (see draw) """
         for face in self.faces:
             # Iterate only through visible faces
-            if(face.visible):
+            if(face.visible if(visible is None) else visible[face.idx]):
                 # For every face build a list of points with coordinates X,Y 
                 temp = []
                 for node in face.nodes:
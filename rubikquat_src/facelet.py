@@ -0,0 +1,209 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import numpy as np
+from . import rubik
+from . import rubikdef
+from . import rutils
+
+#------------------------------------------------------------------------------
+# Facelet Model
+# The state of rubik is a flat array of sticker colors: only the colored faces
+# of cubelets (54 for 3x3x3), in the order they appear in RubikData.data:
+#
+#       RubikData.data:  [ [0, 2, 3, 0, 5, 0], [0, 2, 0, 0, 5, 0], ... ]
+#                              |  |     |            |        |
+#       stickers:        [     2, 3,    5,           2,       5, ... ]
+#
+# Every flip of a set from flip definition list is compiled once into a
+# permutation index array of stickers (move), applying a move is a single
+# gather: stickers = stickers[moves[move]]
+#
+# Moves are indexed by the flip commands (layer, direction) as defined
+# in cmdqueue.flipCmdDefMap: move = layer * 2 + (0 if direction > 0 else 1)
+#
+# Whole-cube rotations (moves of sets containing all cubelets) don't change
+# the puzzle, they change only its orientation. A framed state is the tuple
+# (stickers, frame): frame is one of the orientations (24 for a cube) reached
+# by whole-cube rotations, the stickers are kept in the orientation of frame 0:
+#
+#       physical stickers = stickers[frames[frame]]
+#
+# A whole-cube rotation only changes the frame (table lookup), a layer move
+# is remapped through the frame to the layer it turns in frame 0.
+#------------------------------------------------------------------------------
+class FaceletModel:
+    """ Facelet Model - compact rubik state and compiled moves """
+
+    def __init__(self, rubikDef, flipDef, moves = None):
+        """ Initialize facelet model
+            rubikDef - Rubik definition: Definition of cubelets and their face colors
+            flipDef - list of flipping set definitions (index in list is the layer)
+            moves - optional already compiled moves (ex: loaded from cache) """
+        self.rubikDef = rubikDef
+        self.flipDef = flipDef
+        self.count = len(rubikDef)
+        faces = np.array([cDef[1] for cDef in rubikDef], dtype=np.uint8).reshape(-1)
+
+        # Index of every sticker in the flattened RubikData.data (count * 6)
+        self.slots = np.flatnonzero(faces)
+        # Colors of stickers in the solved (initial) state
+        self.solved = faces[self.slots]
+        # Index of stickers for every face of rubik [F,T,L,R,K,B] (6 x stickers per face)
+        self.faceGroups = np.array([np.flatnonzero((self.slots % 6) == f) for f in range(6)])
+        # Index of every face in stickers list (-1 for faces without color)
+        slotSticker = np.full(self.count * 6, -1, dtype=np.intp)
+        slotSticker[self.slots] = np.arange(len(self.slots))
+
+        if(moves is not None):
+            self.moves = moves
+        else:
+            # Compile every move, the engine flips the set in the opposite direction of command
+            self.moves = np.empty((len(flipDef) * 2, len(self.slots)), dtype=np.intp)
+            for layer, setDef in enumerate(flipDef):
+                for direction in (1, -1):
+                    perm = rubik.flipPerm(self.count, setDef, -direction)
+                    self.moves[self.moveIndex(layer, direction)] = slotSticker[perm[self.slots]]
+
+            # A flip must move stickers only to stickers (never to faces without color)
+            if((self.moves < 0).any()):
+                raise Exception("Flip definition moves colors to faces without color")
+
+        self.buildFrames()
+
+    def buildFrames(self):
+        """ Build the tables of frames (orientations of rubik) used by the framed states:
+            isWhole - True for every move which rotates the whole rubik
+            layerMoves - the moves which are not whole-cube rotations
+            frames - (frames, stickers) permutation of stickers from frame 0 into every frame
+            frameMul - (frames, moves) frame after a whole-cube rotation (-1 for other moves)
+            frameMove - (frames, moves) move in frame 0 for a move in every frame 
+                        (-1 if the layer is not in flip definition list) """
+        moveCount = len(self.moves)
+        self.isWhole = np.array([(self.flipDef[move >> 1][0] is None) 
+                                 or (len(set(self.flipDef[move >> 1][0])) == self.count) 
+                                 for move in range(moveCount)], dtype=bool)
+        self.layerMoves = np.flatnonzero(~self.isWhole)
+
+        # All frames reachable with whole-cube rotations (breadth first)
+        frames = [np.arange(len(self.slots))]
+        frameIdx = {frames[0].tobytes(): 0}
+        frameMul = []
+        f = 0
+        while(f < len(frames)):
+            frameMul.append(np.full(moveCount, -1, dtype=np.intp))
+            for move in np.flatnonzero(self.isWhole):
+                perm = frames[f][self.moves[move]]
+                key = perm.tobytes()
+                if(key not in frameIdx):
+                    frameIdx[key] = len(frames)
+                    frames.append(perm)
+                frameMul[f][move] = frameIdx[key]
+            f += 1
+        self.frames = np.array(frames)
+        self.frameMul = np.array(frameMul)
+
+        # A layer move in a frame is the layer move conjugated by the frame in frame 0
+        moveIdx = {perm.tobytes(): move for move, perm in enumerate(self.moves)}
+        self.frameMove = np.tile(np.arange(moveCount), (len(frames), 1))
+        for f, perm in enumerate(frames):
+            inv = np.argsort(perm)
+            for move in self.layerMoves:
+                self.frameMove[f, move] = moveIdx.get(perm[self.moves[move]][inv].tobytes(), -1)
+
+    @staticmethod
+    def moveIndex(layer, direction):
+        """ Return the index of a move for a flip command (layer, direction) """
+        return layer * 2 + (0 if(direction > 0) else 1)
+
+    @staticmethod
+    def moveCmd(move):
+        """ Return the flip command (layer, direction) of a move """
+        return (move >> 1, -1 if(move & 1) else 1)
+
+    def getState(self, rubikData):
+        """ Return the stickers of a RubikData instance """
+        return rubikData.data.reshape(-1)[self.slots]
+
+    def setState(self, rubikData, stickers):
+        """ Set the stickers of a RubikData instance """
+        rubikData.data.reshape(-1)[self.slots] = stickers
+
+    def apply(self, stickers, move):
+        """ Apply a move to stickers, return the new stickers """
+        return stickers[self.moves[move]]
+
+    def applySeq(self, stickers, moves):
+        """ Apply a sequence of moves to stickers, return the new stickers """
+        for move in moves:
+            stickers = stickers[self.moves[move]]
+        return stickers
+
+    def applyFramed(self, stickers, frame, move):
+        """ Apply a move to a framed state, return the new framed state (stickers, frame):
+            a whole-cube rotation changes only the frame, a layer move is remapped through frame """
+        if(self.isWhole[move]):
+            return stickers, int(self.frameMul[frame, move])
+        return stickers[self.moves[self.frameMove[frame, move]]], frame
+
+    def applySeqFramed(self, stickers, frame, moves):
+        """ Apply a sequence of moves to a framed state, return the new framed state (stickers, frame) """
+        for move in moves:
+            if(self.isWhole[move]):
+                frame = self.frameMul[frame, move]
+            else:
+                stickers = stickers[self.moves[self.frameMove[frame, move]]]
+        return stickers, int(frame)
+
+    def getPhysical(self, stickers, frame):
+        """ Return the stickers of a framed state in the actual orientation (see setState) """
+        return stickers[self.frames[frame]]
+
+    def isSolved(self, stickers):
+        """ Return True if rubik is solved: every face has only one color 
+            (also in case the entire rubik was flipped) """
+        s = stickers[self.faceGroups]
+        return bool((s == s[:, :1]).all())
+
+#------------------------------------------------------------------------------
+# Facelet Models already loaded: size --> FaceletModel
+_models = {}
+
+def getModel(n = 3):
+    """ Return the facelet model of a NxNxN rubik (generated with rubikdef.generate).
+        The compiled moves are memoized (also on disk, see rutils.getCacheDir) """
+    if(n in _models):
+        return _models[n]
+
+    cubelets, flipDef = rubikdef.generate(n)
+    fileName = os.path.join(rutils.getCacheDir(), f'facelet_v{rubikdef.genVersion}_{n}.npy')
+    stickers = sum(1 for cDef in cubelets for f in cDef[1] if(f))
+    try:
+        moves = np.load(fileName)
+        # a damaged or stale file is generated again
+        if((moves.shape != (len(flipDef) * 2, stickers)) or (moves.min() < 0) or (moves.max() >= stickers)):
+            moves = None
+    except Exception:
+        moves = None
+    model = FaceletModel(cubelets, flipDef, moves)
+    if(moves is None):
+        try:
+            rutils.writeFile(fileName, lambda f: np.save(f, model.moves))
+        except OSError:
+            pass
+
+    _models[n] = model
+    return model
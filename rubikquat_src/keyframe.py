@@ -0,0 +1,84 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from .quaternion import Quaternion
+
+#------------------------------------------------------------------------------
+# Key Frames
+# Precomputed rotations of an animation which rotates with a fixed step
+# along one of the axes X, Y, Z. For every axis, direction (1, -1) and step k
+# the rotation with degree (direction * k * stepRad) is stored as a tuple
+# (quaternion, 3x3 matrix), step 0 is the identity:
+#
+#       ('X', 1):  [ (q0, m0), (q1, m1), (q2, m2), ... (qN, mN) ]
+#       ('X', -1): [ (q0, m0), (q1, m1), (q2, m2), ... (qN, mN) ]
+#       ...
+#
+# The animation loop only looks up the rotation of the actual step, a degree
+# between two steps is interpolated (slerp) between the neighbour key frames.
+#------------------------------------------------------------------------------
+class KeyFrames:
+    """ Key Frames - precomputed rotations of an animation """
+
+    # Unit vectors of axes
+    axisUnit = {'X': (1, 0, 0), 'Y': (0, 1, 0), 'Z': (0, 0, 1)}
+
+    def __init__(self, stepRad, steps):
+        """ Initialize key frames
+            stepRad - rotation degree of one step in radians
+            steps - count of steps to precompute (more steps are computed when requested) """
+        self.stepRad = stepRad
+        self.steps = 0
+        self.frames = {}
+        for axis in self.axisUnit:
+            for direction in (1, -1):
+                self.frames[(axis, direction)] = []
+        self.extend(steps)
+
+    def extend(self, steps):
+        """ Precompute the rotations up to (including) step """
+        for (axis, direction), frames in self.frames.items():
+            for k in range(len(frames), steps + 1):
+                q = Quaternion.from_axisangle(direction * k * self.stepRad, self.axisUnit[axis])
+                frames.append((q, q.get_matrix()))
+        self.steps = max(self.steps, steps)
+
+    def get(self, axis, direction, step):
+        """ Return the rotation (q, m) of a step 
+            axis - axis of rotation ('X', 'Y' or 'Z')
+            direction - direction of rotation: 1 or -1
+            step - step of animation (0 = no rotation) """
+        if(step > self.steps):
+            self.extend(step)
+        return self.frames[(axis, 1 if(direction > 0) else -1)][step]
+
+    def interpolate(self, axis, direction, rad, slerp = True):
+        """ Return the rotation (q, m) for a degree between key frames
+            axis - axis of rotation ('X', 'Y' or 'Z')
+            direction - direction of rotation: 1 or -1
+            rad - rotation degree in radians (>= 0.0) 
+            slerp - True: interpolate between the neighbour key frames,
+                    False: use the nearest key frame (only a lookup) """
+        pos = rad / self.stepRad
+        if(not slerp):
+            return self.get(axis, direction, int(round(pos)))
+        step = int(pos)
+        t = pos - step
+        if(t < 1e-6):
+            return self.get(axis, direction, step)
+        q0 = self.get(axis, direction, step)[0]
+        q1 = self.get(axis, direction, step + 1)[0]
+        q = Quaternion.slerp(q0, q1, t)
+        return (q, q.get_matrix())
@@ -0,0 +1,213 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import re
+import mmap
+import numpy as np
+from . import facelet
+
+#------------------------------------------------------------------------------
+# Notation Parser
+# Standard move notation (one sequence per line, spaces optional):
+#
+#       U D L R F B     face turned clockwise (seen from the face)
+#       U' U2 U2'       counterclockwise, half turn
+#       Uw u 3Uw        wide: the face and the next layer, 3 outer layers
+#       2U              only the second layer from face (NxNxN)
+#       M E S           middle slice turned as L, D, F (odd sizes)
+#       x y z           entire rubik turned as R, U, F
+#       # ...           comment until the end of line
+#
+# Attention: the lowercase faces are wide moves (standard notation), not the
+# flip commands of cmdqueue.flipCmdList.
+#
+# Every move is translated into flip commands (layer, direction) of the flip
+# definition list (see cmdqueue.flipCmdDefMap, rubikdef.generate), the
+# direction is the sense of rotation on the axis of layer:
+#
+#       "R U' M2"  -->  [(3, -1), (1, -1), (9, 1), (9, 1)]
+#
+# or into the moves of facelet model (uint8, see facelet.FaceletModel) used by
+# the batch engine (see batch.RubikBatch). The translation of every distinct
+# token is memoized, a file is read line by line (memory-mapped), the errors
+# report the line and the column.
+#------------------------------------------------------------------------------
+class NotationError(ValueError):
+    """ Notation Error - invalid move, with the position in text """
+
+    def __init__(self, message, line, column):
+        ValueError.__init__(self, f"line {line}, column {column}: {message}")
+        self.line = line
+        self.column = column
+
+# Token: [layers] face/slice/rotation [w] [2] [']
+_token = re.compile(r"(\d*)([UDLRFBudlrfbMESxyz])(w?)(2?)('?)")
+_space = re.compile(r"\s*")
+
+# Faces: (axis, side of axis: -1 = negative coordinate), rubik coordinates:
+# U: y = -h, D: y = +h, L: x = -h, R: x = +h, F: z = -h, B: z = +h
+_faces = {'U': ('Y', -1), 'D': ('Y', 1), 'L': ('X', -1), 'R': ('X', 1), 'F': ('Z', -1), 'B': ('Z', 1)}
+
+# Middle slices and rotations: turned as face
+_slices = {'M': 'L', 'E': 'D', 'S': 'F'}
+_rotations = {'x': 'R', 'y': 'U', 'z': 'F'}
+
+class NotationParser:
+    """ Notation Parser - standard move notation to flip commands or moves """
+
+    def __init__(self, model = None):
+        """ Initialize parser
+            model - facelet model of rubik (default: 3x3x3) """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.size = round(len(model.rubikDef) ** (1.0 / 3.0))
+
+        # Layers of every axis ordered by coordinate and the whole-rubik layer of every axis
+        self.axisLayers = {'X': [], 'Y': [], 'Z': []}
+        self.wholeLayer = {}
+        for layer, setDef in enumerate(model.flipDef):
+            axis = setDef[3]
+            if(len(setDef[0]) == len(model.rubikDef)):
+                self.wholeLayer[axis] = layer
+            else:
+                coord = model.rubikDef[setDef[0][0]][0]['XYZ'.index(axis)]
+                self.axisLayers[axis].append((coord, layer))
+        for axis in self.axisLayers:
+            self.axisLayers[axis] = [layer for coord, layer in sorted(self.axisLayers[axis])]
+
+        # token --> tuple of flip commands (layer, direction)
+        self.tokens = {}
+
+    def faceLayers(self, face, first, last):
+        """ Return the layers from depth first to depth last (1 = the face) and the
+            direction of a clockwise turn of face """
+        axis, side = _faces[face]
+        layers = self.axisLayers[axis] if(side < 0) else self.axisLayers[axis][::-1]
+        if((first < 1) or (last > len(layers))):
+            return None, 0
+        # the direction of a clockwise turn is the inverse on the positive side of axis
+        return layers[first - 1 : last], -side
+
+    def translate(self, match):
+        """ Return the flip commands of a token (match of _token) or None if invalid """
+        count, face, wide, double, prime = match.groups()
+        turns = -1 if(prime) else 1
+        if(face in _rotations):
+            if(count or wide):
+                return None
+            # the whole rubik turns in the same direction as the face
+            direction = self.faceLayers(_rotations[face], 1, 1)[1]
+            layers = [self.wholeLayer[_faces[_rotations[face]][0]]]
+        elif(face in _slices):
+            if(count or wide or (self.size % 2 == 0)):
+                return None
+            depth = (self.size + 1) // 2
+            layers, direction = self.faceLayers(_slices[face], depth, depth)
+        else:
+            if(face.islower()):
+                if(wide):
+                    return None
+                face, wide = face.upper(), 'w'
+            depth = int(count) if(count) else (2 if(wide) else 1)
+            if(wide):
+                layers, direction = self.faceLayers(face, 1, depth)
+            else:
+                layers, direction = self.faceLayers(face, depth, depth)
+        if(not layers):
+            return None
+        cmds = tuple((layer, direction * turns) for layer in layers)
+        return cmds * 2 if(double) else cmds
+
+    def parse(self, text, line = 1):
+        """ Return the list of flip commands (layer, direction) of a sequence
+            text - one sequence of moves (until the end of text or a comment)
+            line - line number of text (for errors)
+            raise NotationError for an invalid move """
+        cmds = []
+        tokens = self.tokens
+        pos = _space.match(text).end()
+        end = len(text)
+        while((pos < end) and (text[pos] != '#')):
+            match = _token.match(text, pos)
+            if((match is None) or (match.end() == pos)):
+                raise NotationError(f"invalid move '{text[pos:].split()[0]}'", line, pos + 1)
+            token = match.group()
+            translated = tokens.get(token)
+            if(translated is None):
+                translated = self.translate(match)
+                if(translated is None):
+                    raise NotationError(f"move '{token}' doesn't exist for a {self.size}x{self.size}x{self.size} rubik", line, pos + 1)
+                tokens[token] = translated
+            cmds += translated
+            pos = _space.match(text, match.end()).end()
+        return cmds
+
+    def parseMoves(self, text, line = 1):
+        """ Return the moves of facelet model (uint8 array) of a sequence (see parse) """
+        moveIndex = self.model.moveIndex
+        return np.array([moveIndex(layer, direction) for layer, direction in self.parse(text, line)], dtype=np.uint8)
+
+    def parseLines(self, lines, moves = False):
+        """ Generator of sequences: one for every line which is not empty or a comment
+            lines - iterable of strings (ex: an open file)
+            moves - if True the sequences are uint8 moves, otherwise flip commands """
+        parse = self.parseMoves if(moves) else self.parse
+        for lineNo, text in enumerate(lines, 1):
+            # the text is parsed with its leading spaces (the columns of errors)
+            start = text.lstrip()
+            if(start and (start[0] != '#')):
+                yield parse(text, lineNo)
+
+    def parseFile(self, fileName, moves = False):
+        """ Generator of sequences of a file (memory-mapped, read line by line), see parseLines """
+        with open(fileName, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return  # empty file
+            with data:
+                yield from self.parseLines((line.decode('utf-8') for line in iter(data.readline, b'')), moves)
+
+    def batches(self, fileName, size):
+        """ Generator of batches of sequences of a file: (size, length) uint8 arrays
+            padded with the "no move" of batch engine (see batch.RubikBatch.applySeq) """
+        nop = len(self.model.moves)
+        batch = []
+        for seq in self.parseFile(fileName, True):
+            batch.append(seq)
+            if(len(batch) == size):
+                yield self.pad(batch, nop)
+                batch = []
+        if(batch):
+            yield self.pad(batch, nop)
+
+    @staticmethod
+    def pad(seqs, nop):
+        """ Return the sequences (uint8 arrays) in one array, padded with nop """
+        result = np.full((len(seqs), max([len(seq) for seq in seqs] + [1])), nop, dtype=np.uint8)
+        for row, seq in enumerate(seqs):
+            result[row, :len(seq)] = seq
+        return result
+
+#------------------------------------------------------------------------------
+# Parsers already created: size --> NotationParser
+_parsers = {}
+
+def getParser(n = 3):
+    """ Return the notation parser of a NxNxN rubik (see facelet.getModel) """
+    if(n not in _parsers):
+        _parsers[n] = NotationParser(facelet.getModel(n))
+    return _parsers[n]
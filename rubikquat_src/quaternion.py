@@ -30,6 +30,26 @@ class Quaternion:
         new_quaternion._val = value
         return new_quaternion
 
+    def slerp(q0, q1, t):
+        """ Spherical linear interpolation between two unit quaternions
+            t - interpolation factor: 0.0 = q0 ... 1.0 = q1 """
+        v0 = q0._val
+        v1 = q1._val
+        dot = float(np.dot(v0, v1))
+        # take the shortest path
+        if(dot < 0.0):
+            v1 = -v1
+            dot = -dot
+        # quaternions very close: linear interpolation
+        if(dot > 0.9995):
+            v = v0 + t * (v1 - v0)
+            return Quaternion.from_value(v / np.linalg.norm(v))
+        theta0 = acos(dot)
+        theta = theta0 * t
+        s1 = sin(theta) / sin(theta0)
+        s0 = cos(theta) - dot * s1
+        return Quaternion.from_value(s0 * v0 + s1 * v1)
+
     def _axisangle_to_q(self, theta, v):
         x = v[0]
         y = v[1]
@@ -87,6 +107,14 @@ class Quaternion:
 
         return theta, normalize(v)
 
+    def get_matrix(self):
+        """ Return the 3x3 rotation matrix of this (unit) quaternion,
+            so that: m @ v == q * v """
+        w, x, y, z = self._val
+        return np.array([[1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)],
+                         [2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)],
+                         [2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)]])
+
     def tolist(self):
         return self._val.tolist()
 
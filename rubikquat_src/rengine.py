@@ -13,17 +13,31 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
+import math
+import time
 import pygame
+import numpy as np
+from . import keyframe
 from . import rubikdef
 from . import rubik
 from . import axis
 from .quaternion import Quaternion
 
+# Dirty flags (returned by RubikEngine.process, combined with |): the state changed
+# since the last frame and what must be recalculated (see RubikEngine.rotate)
+DIRTY_NONE      = 0x00
+DIRTY_ROTATION  = 0x01  # rotation of entire rubik (incremental, relative or base rotation)
+DIRTY_FLIP      = 0x02  # rotation of flipping set
+DIRTY_SETS      = 0x04  # rubik was divided in flipping sets or merged back
+DIRTY_DATA      = 0x08  # colors of cubelets (a flip finished)
+DIRTY_ALL       = 0x0F
+
 class RubikEngine:
     """ Rubik Engine """
     
-    def __init__(self, resMan, width_height, surface, backColor):
-        """ Init """
+    def __init__(self, resMan, width_height, surface, backColor, size = 3):
+        """ Init 
+            size - size of rubik (NxNxN) """
 
         # Init resource manager
         self.resMan = resMan
@@ -44,54 +58,100 @@ class RubikEngine:
         self.reqIncAxs = ''     # Requested axis of incremental rotation
         
         self.actIncRad = 0.0    # Actual destination of incremental rotation [radians]
-        self.actIncVal = 0.0    # Actual degree of incremental rotation [radians]
+        self.actIncStart = 0.0  # Start time of incremental rotation [seconds]
         self.actIncAxs = ''     # Actual axis of incremental rotation
         
         self.reqRelRad = (0.0, 0.0, 0.0)
         
-        # Rubik flip request
-        self.reqFlipIdx = -1
-        self.reqFlipDir = 0
+        # Rubik flip request: list of flips [flipIdx, flipDir, turns] to be started together
+        # (see reqFlip and addFlip)
+        self.reqFlips = []
+        
+        # Key frames of animations: incremental rotation (fixed steps of 0.1 rad) 
+        # and flipping (90 degrees in flipSteps steps, see setFlipSteps)
+        self.incFrames = keyframe.KeyFrames(0.1, 6)
+        self.setFlipSteps(10)
+        
+        # Animations are driven by the elapsed time (not by the count of frames):
+        # angular velocity of incremental rotation and flipping [radians/second]
+        self.incVelocity = 6.0
+        self.flipVelocity = 9.0
+        # Interpolate (slerp) between key frames, if False use the nearest key frame
+        self.slerp = True
+        # A flip started not later than carryTime [seconds] after the end of previous flip
+        # starts at the end of previous flip (the commands in queue are played without gaps)
+        self.carryTime = 0.1
+        self.flipEnd = float('-inf')
+        # Adaptive playback speed: the flips are faster when more commands are waiting
+        # (see setQueueDepth), speed factor = 1.0 + depth * speedGain (maximal speedMax)
+        self.speedGain = 0.125
+        self.speedMax = 4.0
+        self.speed = 1.0
+        # More commands than instantDepth waiting: apply them without animation (see applyFlip)
+        self.instantDepth = 50
         
         # Rotation quaternions
-        self.qflp = Quaternion.from_axisangle(0, self.z_axis_unit)  # Rotation of flipping set
+        self.qident, self.mident = self.incFrames.get('Z', 1, 0)   # No rotation
         self.qrot = Quaternion.from_axisangle(0, self.z_axis_unit)  # Base rotation of entire rubik
-        self.qinc = Quaternion.from_axisangle(0, self.z_axis_unit)  # Incremental rotation of entire rubik
+        self.qinc = self.qident     # Incremental rotation of entire rubik
         self.qrel = Quaternion.from_axisangle(0, self.z_axis_unit)  # Relative rotation of entire rubik
         
-        # Define the rubik
-        self.rubik = rubik.RubikExt(rubikdef.c3x3)
-        self.rubik.out()
+        # Composed rotation (qrel * qinc * qrot) cache: the rotations it was composed from,
+        # the composed rotation and its matrix. Rotations are never modified in place 
+        # (always replaced), so the composed rotation is recalculated only if one was replaced.
+        self.qCacheSrc = (None, None, None)
+        self.qCache = None
+        self.mCache = None
+        
+        # Define the rubik (generated definition, for size 3 identical to rubikdef.c3x3),
+        # the entire rubik has the same width independent of its size
+        self.size = size
+        rubikDef, self.rubFlipDef = rubikdef.generate(size)
+        self.rubik = rubik.RubikExt(rubikDef, 180 / size)
         
         # Define the set containing the entire rubik (used to display rubik in case of no flipping)
         self.rubSetAll = rubik.RubikSetDraw(self.rubik, (None, None, None, "Y", 1))
         self.rubSetAll.updateZorder()
+        self.rubSetAll.updateView()
+        
+        # Renderer mode: 
+        #   True - octant draw mode: the visible faces and the draw order of every set are 
+        #          selected by the view direction (see RubikSetDraw.updateView)
+        #   False - z-order draw mode: visibility of every face of every cubelet and 
+        #           sorting cubelets by Z every frame (see RubikSetDraw.updateZorder)
+        self.octantDraw = True
     
         # Define sets for flipping 
-        # During the flipping rubik is divided in two sets A and B
-        # Set A is the dynamic set - which flips.
-        # Set B is the static set which doesn't flip (rubSetFlipB = rubSetAll - rubSetFlipA)
-        self.rubSetFlipA = None
-        self.rubSetFlipB = None
-
-        # Definitions for flipping sets
-        self.rubFlipDef = []
-        self.rubFlipDef.append(rubikdef.c3x3_front)  # 0 = Front Rubik layer
-        self.rubFlipDef.append(rubikdef.c3x3_top)    # 1 = Top Rubik layer
-        self.rubFlipDef.append(rubikdef.c3x3_left)   # 2 = Left Rubik layer
-        self.rubFlipDef.append(rubikdef.c3x3_right)  # 3 = Right Rubik layer
-        self.rubFlipDef.append(rubikdef.c3x3_ally)   # 4 = Entire Rubik flip on Y axis
-        self.rubFlipDef.append(rubikdef.c3x3_allx)   # 5 = Entire Rubik flip on X axis
-        self.rubFlipDef.append(rubikdef.c3x3_allz)   # 6 = Entire Rubik flip on Z axis
+        # During the flipping rubik is divided in sets A and B
+        # Sets A are the dynamic sets - which flip. It is a list of sets: several layers 
+        # on the same axis, not overlapping each other, flip together (see addFlip).
+        # Set B is the static set which doesn't flip (rubSetFlipB = rubSetAll - rubSetFlipA),
+        # it is a list of sets: one for every contiguous part of rubik (an inner slice divides 
+        # the rest of rubik in two parts)
+        # The definitions for flipping sets are in self.rubFlipDef (see rubikdef.generate)
+        self.rubSetFlipA = []
+        self.rubSetFlipB = []
+        # Cubelets of every flipping definition (used to check if flips overlap)
+        self.flipCubel = [frozenset(range(self.rubik.count) if(d[0] is None) else d[0]) for d in self.rubFlipDef]
         
-        # Index of flipping definition currently active (-1 no flipping currently active)
-        self.actFlipIdx = -1
-        # Index of flipping definition currently requested (-1 no flipping currently requested)
-        self.reqFlipIdx = -1
-        # Rotation degree of currently flipping set
-        self.actFlipRad = 0.0
-        # Requested DIrection of flipping
-        self.reqFlipDir = 0
+        # Pool of flipping sets built once (divide is only a lookup):
+        # flipSetA - the dynamic set A for every flipping definition
+        # flipSetB - the static sets B for a combination of flipping definitions (frozenset of indexes),
+        #   for every single flipping definition built at startup, for several flipping definitions
+        #   flipping together (see addFlip) built when used the first time
+        self.flipSetA = []
+        self.flipSetB = {}
+        for idx, setFlipDef in enumerate(self.rubFlipDef):
+            self.flipSetA.append(rubik.RubikSetDraw(self.rubik, setFlipDef))
+            self.buildSetB([idx])
+
+        # Flips currently active [flipIdx, flipDir, turns] (one for every set A)
+        self.actFlips = []
+        # Rotation matrices of flipping sets A
+        self.mflp = []
+        # Start time of currently flipping sets [seconds] and their angular velocity
+        self.actFlipStart = 0.0
+        self.actFlipVelocity = self.flipVelocity
         
         # F-axis
         self.axisList = axis.AxisList(self.resMan)
@@ -100,32 +160,44 @@ class RubikEngine:
         self.axisList.append(axis.Axis(2, ( 100.0, 0.0, 0.0), ( 150.0, 0.0, 0.0))) # R
         self.axisList.append(axis.Axis(3, (0.0, -100.0, 0.0), (0.0, -150.0, 0.0))) # T
     
-    def divide(self, flipSetIdx = -1):
-        """ Divide rubik in two sets:
-                1. rubSetFlipA - is the flipping set defined in rubFlipDef
-                2. rubSetFlipB - is the rest of rubik containing nodes not in flipping set
-            flipSetIdx - index of flipping definition to be used for flipping set
-                or -1 when rubik is not divided (rubSetFlipA = None) """
+    def buildSetB(self, flipSetIdx):
+        """ Build the static sets B for a list of flipping definitions (see divide)
+            and add them to the pool, return the list of sets B """
+        # the rest of rubik: the complement of cubelets of flipping sets A
+        mask = np.ones(self.rubik.count, dtype=bool)
+        for idx in flipSetIdx:
+            mask[np.fromiter(self.flipCubel[idx], dtype=np.intp)] = False
+        restCubel = np.flatnonzero(mask).tolist()
+        # one set B for every contiguous part of the rest of rubik
+        flipAxis = self.rubFlipDef[flipSetIdx[0]][3]
+        setsB = []
+        for part in self.rubik.splitLayers(flipAxis, restCubel):
+            setsB.append(rubik.RubikSetDraw(self.rubik, (part, None, None, flipAxis, 1)))
+        self.flipSetB[frozenset(flipSetIdx)] = setsB
+        return setsB
+
+    def divide(self, flipSetIdx = []):
+        """ Divide rubik in sets (taken from the pool of flipping sets):
+                1. rubSetFlipA - are the flipping sets defined in rubFlipDef
+                2. rubSetFlipB - is the rest of rubik containing nodes not in flipping sets
+                   (list of sets, one for every contiguous part)
+            flipSetIdx - list of indexes of flipping definitions to be used for flipping sets
+                (layers on the same axis, not overlapping each other)
+                or an empty list when rubik is not divided (rubSetFlipA = []) """
                 
-        self.actFlipDefIdx = flipSetIdx
-        if(self.actFlipDefIdx < 0):
-            self.rubSetFlipA = None
-            self.rubSetFlipB = None
+        if(len(flipSetIdx) == 0):
+            self.rubSetFlipA = []
+            self.rubSetFlipB = []
             return;
             
-        # Create the dynamic flipping set A
-        setFlipDef = self.rubFlipDef[self.actFlipDefIdx]
-        self.rubSetFlipA = rubik.RubikSetDraw(self.rubik, setFlipDef)
-        self.rubSetFlipA.updateZorder()
+        # The dynamic flipping sets A
+        self.rubSetFlipA = [self.flipSetA[idx] for idx in flipSetIdx]
         
-        # Create the static set B for the rest of rubik 
-        # (which includes the cubelets from Rubik that are not part of dynamic flipping set A)
-        restCubel = self.rubSetFlipA.diff()
-        if(len(restCubel) > 0):
-            self.rubSetFlipB = rubik.RubikSetDraw(self.rubik, (restCubel, None, None, "Y", 1))
-            self.rubSetFlipB.updateZorder()
-        else:
-            self.rubSetFlipB = None
+        # The static sets B for the rest of rubik 
+        # (which includes the cubelets from Rubik that are not part of dynamic flipping sets A)
+        self.rubSetFlipB = self.flipSetB.get(frozenset(flipSetIdx))
+        if(self.rubSetFlipB is None):
+            self.rubSetFlipB = self.buildSetB(flipSetIdx)
     
     def display(self, surface, offset):
         """ Draw the sets on the surface. """
@@ -133,63 +205,83 @@ class RubikEngine:
         self.resMan.draw(self.surface, 38, 0, 0)
         self.axisList.drawBack(self.surface, self.draw_offset);
         
-        # In case both sets A and B defined
-        if((self.rubSetFlipA != None) and (self.rubSetFlipB != None)):
-            # Take care about the Z-Order of sets
-            if(self.rubSetFlipA.getZcenter() < self.rubSetFlipB.getZcenter()):
-                self.rubSetFlipB.draw(self.surface, self.draw_offset)
-                self.rubSetFlipA.draw(self.surface, self.draw_offset)
-            else:
-                self.rubSetFlipA.draw(self.surface, self.draw_offset)
-                self.rubSetFlipB.draw(self.surface, self.draw_offset)
-        
-        # In case only A set defined (flipping the entire rubik)
-        elif(self.rubSetFlipA != None):
-            self.rubSetFlipA.draw(self.surface, self.draw_offset)
+        # In case set A defined (and sets B if not flipping the entire rubik)
+        if(len(self.rubSetFlipA) > 0):
+            # Take care about the Z-Order of sets: the sets in background first
+            sets = sorted(self.rubSetFlipA + self.rubSetFlipB, key=lambda s: s.getZcenter(), reverse = True)
+            for s in sets:
+                s.draw(self.surface, self.draw_offset, self.octantDraw)
         
         # In case if no set defined (no flipping)
         else:
-            self.rubSetAll.draw(self.surface, self.draw_offset)
+            self.rubSetAll.draw(self.surface, self.draw_offset, self.octantDraw)
         
         self.axisList.drawFore(self.surface, self.draw_offset);
 
         # Draw Renfinge surface into main surface (applying offset)
         surface.blit(self.surface, offset)
     
-    def rotate(self):
-        """ rotate cubes with angle """
-        
-        # Init Rubik to initial position
-        self.rubik.init0()
-        self.axisList.init0()
+    def getRotation(self):
+        """ Return the composed rotation of the entire rubik (qrel * qinc * qrot) 
+            and its matrix as tuple (q, m), recompute them only if one of the rotations changed """
+        src = (self.qrel, self.qinc, self.qrot)
+        if((src[0] is not self.qCacheSrc[0]) 
+            or (src[1] is not self.qCacheSrc[1]) 
+            or (src[2] is not self.qCacheSrc[2])):
+            self.qCacheSrc = src
+            self.qCache = self.qrel * self.qinc * self.qrot
+            self.mCache = self.qCache.get_matrix()
+        return self.qCache, self.mCache
+
+    def rotate(self, dirty = DIRTY_ALL):
+        """ rotate cubes with angle 
+            dirty - dirty flags (see process): if only the rotation of flipping sets changed
+                    only the flipping sets are transformed """
         
-        # Apply rotation to dynamic flipping layer A
-        if(self.rubSetFlipA != None):
-            self.rubSetFlipA.rotate(self.qflp)
-            
-        # Apply base rotation to entire rubik
-        self.rubik.rotate(self.qrot)
-        self.axisList.rotate(self.qrot)
+        # Composed rotation of entire rubik
+        q, m = self.getRotation()
         
-        # Apply incremental rotation to entire rubik
-        self.rubik.rotate(self.qinc)
-        self.axisList.rotate(self.qinc)
+        # Only the flipping sets rotated
+        if((len(self.rubSetFlipA) > 0) and ((dirty & (DIRTY_ROTATION | DIRTY_SETS)) == 0)):
+            sets = self.rubSetFlipA
+            for setA, mflp in zip(self.rubSetFlipA, self.mflp):
+                setA.transform(m @ mflp)
         
-        # Apply relative rotation to entire rubik
-        self.rubik.rotate(self.qrel)
-        self.axisList.rotate(self.qrel)
+        # Transform rubik from initial position in one pass: 
+        # the dynamic flipping sets A also with flipping rotation, static sets B only with composed rotation
+        else:
+            if(len(self.rubSetFlipA) > 0):
+                sets = self.rubSetFlipA + self.rubSetFlipB
+                for setA, mflp in zip(self.rubSetFlipA, self.mflp):
+                    setA.transform(m @ mflp)
+                for setB in self.rubSetFlipB:
+                    setB.transform(m)
+            else:
+                sets = [self.rubSetAll]
+                self.rubSetAll.transform(m)
+            
+            # Apply composed rotation to axis
+            self.axisList.init0()
+            self.axisList.rotate(q)
         
-        # Update faces
-        self.rubik.updateFaces()
+        # Octant draw mode: only the visible faces and draw order of sets
+        if(self.octantDraw):
+            for s in sets:
+                s.updateView()
         
-        # Update Z-Order
-        if(self.rubSetFlipA != None):
-            self.rubSetFlipA.updateZorder()
-        if(self.rubSetFlipB != None):
-            self.rubSetFlipB.updateZorder()
+        # Z-order draw mode: update faces and Z-Order
         else:
-            self.rubSetAll.updateZorder()
+            for s in sets:
+                for c in s.cubelet:
+                    c.updateFaces()
+            for s in sets:
+                s.updateZorder()
     
+    def setFlipSteps(self, steps):
+        """ Set the count of animation steps of a flip (90 degrees) """
+        self.flipSteps = steps
+        self.flipFrames = keyframe.KeyFrames(math.pi / 2 / steps, steps)
+
     def getAxisByName(self, axisName):
         """ Return axis by name """
         if(axisName == 'X'):
@@ -198,9 +290,17 @@ class RubikEngine:
             return self.y_axis_unit
         return self.z_axis_unit
     
-    def process(self):
-        """ Main process function, to be called cyclically 
-            Returns True if display must be refreshed, if not returns False """
+    def process(self, now = None):
+        """ Main process function, to be called cyclically.
+            All pending requests and running animations are handled in one pass
+            (incremental rotation, relative rotation and flipping together).
+            now - actual time in seconds (default: time.perf_counter())
+            Returns the dirty flags (DIRTY_...) of the state changed in this pass,
+            DIRTY_NONE (0) if display must not be refreshed """
+        
+        if(now is None):
+            now = time.perf_counter()
+        dirty = DIRTY_NONE
         
         # Incremental rotation requested?
         if(self.reqIncRad != 0.0):
@@ -209,37 +309,27 @@ class RubikEngine:
             if(self.actIncRad != 0.0):
                 q = Quaternion.from_axisangle(self.actIncRad, self.getAxisByName(self.actIncAxs))
                 self.qrot = q * self.qrot
-            # Set new destination/axis for the incremental rotation and reset current value
+            # Set new destination/axis for the incremental rotation and start time
             self.actIncRad = self.reqIncRad
             self.actIncAxs = self.reqIncAxs
-            self.actIncVal = 0.0
-            self.qinc = Quaternion.from_axisangle(0, self.z_axis_unit)
+            self.actIncStart = now
+            self.qinc = self.qident
             # Clear the request
             self.reqIncRad = 0.0
-            return True
+            dirty |= DIRTY_ROTATION
         
-        # Incremental rotation in process?
-        if(self.actIncRad != 0.0):
-            if(self.actIncVal < self.actIncRad):
-                self.actIncVal += 0.1
-                # Check if incremental rotation finished (reached destination)
-                if(self.actIncVal >= self.actIncRad):
-                    q = Quaternion.from_axisangle(self.actIncRad, self.getAxisByName(self.actIncAxs))
-                    self.qrot = q * self.qrot
-                    self.actIncRad = 0.0
-                    self.qinc = Quaternion.from_axisangle(0, self.z_axis_unit)
-                    return True
-            if(self.actIncVal > self.actIncRad):
-                self.actIncVal -= 0.1
-                # Check if incremental rotation finished (reached destination)
-                if(self.actIncVal <= self.actIncRad):
-                    q = Quaternion.from_axisangle(self.actIncRad, self.getAxisByName(self.actIncAxs))
-                    self.qrot = q * self.qrot
-                    self.actIncRad = 0.0
-                    self.qinc = Quaternion.from_axisangle(0, self.z_axis_unit)
-                    return True
-            self.qinc = Quaternion.from_axisangle(self.actIncVal, self.getAxisByName(self.actIncAxs))
-            return True
+        # Incremental rotation in process? (if the frame is late jump ahead)
+        elif(self.actIncRad != 0.0):
+            rad = (now - self.actIncStart) * self.incVelocity
+            # Check if incremental rotation finished (reached destination)
+            if(rad >= abs(self.actIncRad)):
+                q = Quaternion.from_axisangle(self.actIncRad, self.getAxisByName(self.actIncAxs))
+                self.qrot = q * self.qrot
+                self.actIncRad = 0.0
+                self.qinc = self.qident
+            else:
+                self.qinc = self.incFrames.interpolate(self.actIncAxs, self.actIncRad, rad, self.slerp)[0]
+            dirty |= DIRTY_ROTATION
         
         # Relative rotation requested
         if(self.reqRelRad != (0.0, 0.0, 0.0)):
@@ -247,42 +337,49 @@ class RubikEngine:
             ry = Quaternion.from_axisangle(self.reqRelRad[1], self.y_axis_unit)
             self.qrel = rx * ry
             self.reqRelRad = (0.0, 0.0, 0.0)
-            return True
+            dirty |= DIRTY_ROTATION
         
         # Flipping currently active?
-        if(self.actFlipIdx != -1):
+        if(len(self.actFlips) > 0):
         
-            # Rotate flipping set with one more step
-            if(self.reqFlipDir < 0):
-                self.actFlipRad -= 0.15
-            elif(self.reqFlipDir > 0):
-                self.actFlipRad += 0.15
-                
-            axis = self.getAxisByName(self.rubSetFlipA.axis)
-            self.qflp = Quaternion.from_axisangle(self.actFlipRad, axis)
+            # Rotate flipping sets to the degree of elapsed time (if the frame is late jump ahead),
+            # a flip of 2 turns (180 degrees) takes the time of 2 flips
+            rad = (now - self.actFlipStart) * self.actFlipVelocity
+            for i, (flipIdx, flipDir, turns) in enumerate(self.actFlips):
+                self.mflp[i] = self.flipFrames.interpolate(self.rubSetFlipA[i].axis, flipDir, 
+                                                           min(rad, turns * math.pi / 2), self.slerp)[1]
+            dirty |= DIRTY_FLIP
             
-            # Flipping set rotated already ~90 degrees? 
-            if((self.actFlipRad < -1.5) or (self.actFlipRad > 1.5)):
-                # Flipping finished, flip the cubes inside the set
-                if(self.rubSetFlipA != None):
-                    self.rubSetFlipA.flip(-self.reqFlipDir)
+            # All flipping sets rotated already to destination (90 or 180 degrees)? 
+            turns = max(flip[2] for flip in self.actFlips)
+            if(rad >= turns * math.pi / 2):
+                self.flipEnd = self.actFlipStart + turns * (math.pi / 2) / self.actFlipVelocity
+                # Flipping finished, flip the cubes inside the sets
+                for setA, flip in zip(self.rubSetFlipA, self.actFlips):
+                    for i in range(flip[2]):
+                        setA.flip(-flip[1])
                 # Destroy the flipping sets
-                self.qflp = Quaternion.from_axisangle(0, self.z_axis_unit)
-                self.actFlipIdx = -1
-                self.divide(-1)
-            return True
+                self.actFlips = []
+                self.mflp = []
+                self.divide([])
+                dirty |= DIRTY_SETS | DIRTY_DATA
         
-        # Flip requested
-        if(self.reqFlipIdx != -1):
-            # Create the new flipping set (by dividing rubik)
-            self.actFlipIdx = self.reqFlipIdx
-            self.reqFlipIdx = -1
-            self.divide(self.actFlipIdx)
-            self.actFlipRad = 0.0
-            return True
+        # Flip requested (also directly after the previous flip finished)
+        if((len(self.reqFlips) > 0) and (len(self.actFlips) == 0)):
+            # Create the new flipping sets (by dividing rubik)
+            self.actFlips = self.reqFlips
+            self.reqFlips = []
+            self.mflp = [self.mident] * len(self.actFlips)
+            self.divide([flip[0] for flip in self.actFlips])
+            self.actFlipVelocity = self.flipVelocity * self.speed
+            # Continue without gap after the previous flip if it just ended
+            if(now - self.flipEnd <= self.carryTime):
+                self.actFlipStart = self.flipEnd
+            else:
+                self.actFlipStart = now
+            dirty |= DIRTY_SETS
         
-        # Idle, do nothing
-        return False
+        return dirty
     
     def reqIncRot(self, axis, degree):
         """ Request incremental rotation along one axis
@@ -303,18 +400,58 @@ class RubikEngine:
         self.qrel = Quaternion.from_axisangle(0, self.z_axis_unit)
     
     def reqFlip(self, flipIdx, flipDir):
-        """ Request Flip of a set 
+        """ Request Flip of a set (further flips to be animated together can be added with addFlip)
+            flipIdx - Index of flipping definition 
+            flipDir - flipping direction: 1 or -1 """
+        self.reqFlips = [[flipIdx, flipDir, 1]]
+    
+    def addFlip(self, flipIdx, flipDir):
+        """ Add a flip to the requested flip(s), all of them are animated together
+            flipIdx - Index of flipping definition 
+            flipDir - flipping direction: 1 or -1
+            Returns True if the flip was added:
+                - the same layer in the same direction as a requested flip: merged into
+                  one flip of 180 degrees
+                - a layer on the same axis not overlapping the requested layers (the flips commute)
+            or False if it must be requested after the requested flips finished """
+        if(len(self.reqFlips) == 0):
+            return False
+        for flip in self.reqFlips:
+            if(flip[0] == flipIdx):
+                if((flip[1] == flipDir) and (flip[2] == 1)):
+                    flip[2] = 2
+                    return True
+                return False
+        for flip in self.reqFlips:
+            if((self.rubFlipDef[flip[0]][3] != self.rubFlipDef[flipIdx][3])
+                or (not self.flipCubel[flip[0]].isdisjoint(self.flipCubel[flipIdx]))):
+                return False
+        self.reqFlips.append([flipIdx, flipDir, 1])
+        return True
+    
+    def setQueueDepth(self, depth):
+        """ Set the count of commands waiting to be executed, 
+            the flips requested from now on are faster if more commands are waiting """
+        self.speed = min(self.speedMax, 1.0 + depth * self.speedGain)
+    
+    def isInstant(self, depth):
+        """ Return True if depth commands waiting are too many to be animated:
+            they have to be applied directly with applyFlip """
+        return (depth > self.instantDepth)
+    
+    def applyFlip(self, flipIdx, flipDir):
+        """ Apply a flip directly to rubik's data without animation 
+            (only when not flipping, the display must be refreshed after)
             flipIdx - Index of flipping definition 
             flipDir - flipping direction: 1 or -1 """
-        self.reqFlipIdx = flipIdx
-        self.reqFlipDir = flipDir
+        self.flipSetA[flipIdx].flip(-flipDir)
     
     def isFlipping(self):
         """ Return True if rubik is currently flipping or has a flipping request
         otherwise return False """
-        return ((self.reqFlipIdx != -1) or (self.actFlipIdx != -1))
+        return ((len(self.reqFlips) > 0) or (len(self.actFlips) > 0))
     
     def mclick(self, pos):
         """ mouse click, detect cubelet on which it was clicked """
         # search first cublet (based on z-order) which is at this pos
-        return self.rubSetAll.mclick((pos[0] - self.draw_offset[0], pos[1] - self.draw_offset[1]))
+        return self.rubSetAll.mclick((pos[0] - self.draw_offset[0], pos[1] - self.draw_offset[1]), self.octantDraw)
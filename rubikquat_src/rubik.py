@@ -13,8 +13,41 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
+import numpy as np
 from . import cubelet
 
+#------------------------------------------------------------------------------
+# Faces flipping definitions:
+# For every axis and direction of fliping (< 0 = clockwise, > 0 = c.clockwise) 
+# the list of source faces for every face [F,T,L,R,K,B] of a cubelet after flipping
+#   (ex: flipFaceSrc['X'][0][0] = 1 --> after flipping clockwise on X axis 
+#        the front face gets the color of top face)
+#                   clockwise            c.clockwise
+flipFaceSrc = {'X': ([1, 4, 2, 3, 5, 0], [5, 0, 2, 3, 1, 4]),
+               'Y': ([3, 1, 0, 4, 2, 5], [2, 1, 4, 0, 3, 5]),
+               'Z': ([0, 2, 5, 1, 4, 3], [0, 3, 1, 5, 4, 2])}
+
+def flipPerm(count, rubikSetDef, direction):
+    """ Compile the flip of a set into a permutation index array over all faces of rubik
+        (flattened RubikData.data, count * 6 elements), such that flipping the set 
+        is the single gather: data[:] = data[perm]
+        count - count of cubelets in rubik
+        rubikSetDef - the definition of the set (see RubikSet.__init__)
+        direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise
+        returns the permutation or None if the set cannot be flipped """
+    cubelIdx, cubelIdx90, _, axis, axisDir = rubikSetDef[:5]
+    if((cubelIdx90 is None) or ((direction * axisDir) == 0)):
+        return None
+    if((direction * axisDir) > 0):
+        dst, src = cubelIdx90, cubelIdx
+    else:
+        dst, src = cubelIdx, cubelIdx90
+    faceSrc = np.array(flipFaceSrc[axis][0 if(direction < 0) else 1])
+    perm = np.arange(count * 6, dtype=np.intp).reshape(count, 6)
+    # cubelet dst gets the faces of cubelet src, flipped along axis
+    perm[np.asarray(dst)] = np.asarray(src)[:, None] * 6 + faceSrc
+    return perm.ravel()
+
 #------------------------------------------------------------------------------
 # Rubik's Data
 # Rubik contains 27 elements (small cubes) called Cubelets.
@@ -38,20 +71,20 @@ from . import cubelet
 class RubikData:
     """ RubikData is the main data storage of Rubik.
         It contains the list of cubelet. Where every cubelet is a list of colors 
-        representing every face. """
+        representing every face (stored as one count x 6 array, every row is a cubelet). """
     
     def __init__(self, rubikDef):
         """ Initialize rubik
             rubikdef - Rubik definition: Definition of cubelets and their face colors """
         self.rubikDef = rubikDef
         self.pos = []   # List of relative positions for every cubelet: tuple (x, y, z)
-        self.data = []  # List of cubelets, every element is a list of faces for that cubelet
         self.count = 0  # Count of cubelets
         #add cubelets
         for cDef in self.rubikDef:
             self.pos.append(cDef[0])            # Relative position for every cubelet (x, y, z)
-            self.data.append(cDef[1].copy())    # Faces definition for every cubelet [0, 2, 3, 0, 5, 0]
             self.count += 1
+        # Array of cubelets, every row is the list of faces for that cubelet [0, 2, 3, 0, 5, 0]
+        self.data = np.array([cDef[1] for cDef in self.rubikDef], dtype=np.uint8).reshape(self.count, 6)
         
     def reset(self):
         """ Reset (reinitialize) Rubik to its default state/values """
@@ -64,84 +97,140 @@ class RubikData:
         for idx, c in enumerate(self.data):
             print(f'{idx:2d} : {c}')
 
+    def flipFaces(self, cubeletIdx, axis, direction):
+        """ Flip the colors of one cubelet between faces on an axis
+        direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise """
+        if(direction != 0):
+            c = self.data[cubeletIdx]
+            c[:] = c[flipFaceSrc[axis][0 if(direction < 0) else 1]]
+
     def flipX(self, cubeletIdx, direction):
         """ Flip the colors of one cubelet between faces on axis X
         direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise """
-        c = self.data[cubeletIdx]
-        col = c[0];
-        if(direction < 0):
-            c[0] = c[1]
-            c[1] = c[4]
-            c[4] = c[5]
-            c[5] = col
-        elif(direction > 0):
-            c[0] = c[5]
-            c[5] = c[4]
-            c[4] = c[1]
-            c[1] = col
+        self.flipFaces(cubeletIdx, 'X', direction)
 
     def flipY(self, cubeletIdx, direction):
         """ Flip the colors of one cubelet between faces on axis Y
         direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise """
-        c = self.data[cubeletIdx]
-        col = c[0];
-        if(direction < 0):
-            c[0] = c[3]
-            c[3] = c[4]
-            c[4] = c[2]
-            c[2] = col
-        elif(direction > 0):
-            c[0] = c[2]
-            c[2] = c[4]
-            c[4] = c[3]
-            c[3] = col
+        self.flipFaces(cubeletIdx, 'Y', direction)
 
     def flipZ(self, cubeletIdx, direction):
         """ Flip the colors of one cubelet between faces on axis Z
         direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise """
-        c = self.data[cubeletIdx]
-        col = c[1];
-        if(direction < 0):
-            c[1] = c[2]
-            c[2] = c[5]
-            c[5] = c[3]
-            c[3] = col
-        elif(direction > 0):
-            c[1] = c[3]
-            c[3] = c[5]
-            c[5] = c[2]
-            c[2] = col
+        self.flipFaces(cubeletIdx, 'Z', direction)
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
 class RubikExt(RubikData):
-    """ RubikExt is the extended Rubik containing also the cubelets in 3D coordinates """
+    """ RubikExt is the extended Rubik containing also the cubelets in 3D coordinates.
+        Only the cubelets on the surface of rubik are created (with only their colored faces),
+        the inside of rubik is never visible: it is drawn as a dark box behind the cubelets 
+        of every set (see getBox).
+        The vertices of all cubelets are stored in one contiguous vertex buffer 
+        (9 rows of X,Y,Z for every cubelet), every cubelet is a view into this buffer. """
     
-    def __init__(self, rubikDef):
+    def __init__(self, rubikDef, width = 60):
         """ Initialize rubik 
-            rubikDef - rubik definition """
+            rubikDef - rubik definition
+            width - distance between centers of cubelets in pixels """
         # initialize rubik's data
         RubikData.__init__(self, rubikDef)
-        # initialize cubelets
-        self.cubelet = []
-        for pos, data in zip(self.pos, self.data):
-            x, y, z = (pos)
-            self.cubelet.append(cubelet.Cubelet((x * 60, y * 60, z * 60), data, 55))
+        self.width = width
+        # the cubelets on the surface of rubik (having at least one colored face)
+        self.surface = np.flatnonzero(self.data.any(axis=1))
+        # coordinates of cubelets (count, 3) and of layers on every axis (X, Y, Z)
+        self.posXYZ = np.array(self.pos, dtype=float).reshape(-1, 3)
+        self.coords = [sorted(set(p[a] for p in self.pos)) for a in range(3)]
+        # initialize vertex buffers: nodes0 - init position 0, nodes1 - after rotation
+        rc = cubelet.Cubelet.rowCount
+        self.nodes0 = np.empty((len(self.surface) * rc, 3))
+        self.nodes1 = np.empty((len(self.surface) * rc, 3))
+        # initialize cubelets (None for cubelets inside of rubik)
+        self.cubelet = [None] * self.count
+        self.cubeletRow = np.full(self.count, -1, dtype=np.intp)  # first row of cubelet in vertex buffer
+        for i, idx in enumerate(self.surface):
+            x, y, z = self.pos[idx]
+            self.cubeletRow[idx] = i * rc
+            rows = slice(i * rc, (i + 1) * rc)
+            self.cubelet[idx] = cubelet.Cubelet((x * width, y * width, z * width), self.data[idx], width * 55 / 60, 
+                                                self.nodes0[rows], self.nodes1[rows], True)
+        self.init0()
         
+    def getRows(self, cubelIdx):
+        """ Return the indexes of rows in vertex buffer used by a list of cubelets """
+        rc = cubelet.Cubelet.rowCount
+        row = self.cubeletRow[np.asarray(cubelIdx, dtype=np.intp)]
+        row = row[row >= 0]
+        return (row[:, None] + np.arange(rc)).ravel()
+
+    def getBox(self, axis, cubelIdx):
+        """ Return the vertices of the box containing a set of cubelets (layers on axis)
+            as a (6 * 6, 3) array: for every face of the box [F,T,L,R,K,B] 4 corners, center and
+            the end of normal (used to detect if the face is visible)
+            axis - axis of the set ('X', 'Y' or 'Z')
+            cubelIdx - list of cubelets in set """
+        a = 'XYZ'.index(axis)
+        # extent of the box: the entire rubik, on axis only the layers of set
+        hw = self.width * 55 / 120
+        lo = [self.coords[i][0] * self.width - hw for i in range(3)]
+        hi = [self.coords[i][-1] * self.width + hw for i in range(3)]
+        layers = self.posXYZ[np.asarray(cubelIdx, dtype=np.intp), a]
+        lo[a] = layers.min() * self.width - hw
+        hi[a] = layers.max() * self.width + hw
+        box = np.empty((36, 3))
+        # faces: (axis, side) for F, T, L, R, K, B
+        for f, (fa, side) in enumerate(((2, -1), (1, -1), (0, -1), (0, 1), (2, 1), (1, 1))):
+            b, c = [i for i in range(3) if(i != fa)]
+            p = box[f * 6 : (f + 1) * 6]
+            p[:, fa] = lo[fa] if(side < 0) else hi[fa]
+            p[0:4, b] = (lo[b], lo[b], hi[b], hi[b])
+            p[0:4, c] = (lo[c], hi[c], hi[c], lo[c])
+            p[4:6, b] = (lo[b] + hi[b]) / 2
+            p[4:6, c] = (lo[c] + hi[c]) / 2
+            p[5, fa] += side
+        return box
+
+    def splitLayers(self, axis, cubelIdx):
+        """ Split a list of cubelets in lists of cubelets from contiguous layers on axis
+            (ex: the rest of rubik without an inner slice is split in two parts) """
+        a = 'XYZ'.index(axis)
+        cubelIdx = np.asarray(cubelIdx, dtype=np.intp)
+        # layer of every cubelet, cubelets ordered by layer
+        layer = np.searchsorted(self.coords[a], self.posXYZ[cubelIdx, a])
+        order = np.argsort(layer, kind='stable')
+        cubelIdx = cubelIdx[order]
+        layer = layer[order]
+        # a new part starts where a layer is missing
+        split = np.flatnonzero(np.diff(layer) > 1) + 1
+        return [part.tolist() for part in np.split(cubelIdx, split) if(len(part) > 0)]
+
     def init0(self):
         """ Init all cubelets to default position """
-        for c in self.cubelet:
-            c.init0()
+        self.nodes1[:] = self.nodes0
 
-    def rotate(self, q):
-        """ Rotate all cubelet with a quaternion (in reference to center) """
-        for c in self.cubelet:
-            c.rotate(q)
+    def rotate(self, q, rows = None):
+        """ Rotate all cubelet with a quaternion (in reference to center) 
+            rows - optional index array of rows in vertex buffer to be rotated (see getRows)"""
+        m = q.get_matrix().T
+        if(rows is None):
+            self.nodes1[:] = self.nodes1 @ m
+        else:
+            self.nodes1[rows] = self.nodes1[rows] @ m
+
+    def transform(self, m, rows = None):
+        """ Transform cubelets from init position 0 straight into rotated position 
+            (replaces init0 followed by one or more rotate calls)
+            m - 3x3 rotation matrix (see Quaternion.get_matrix)
+            rows - optional index array of rows in vertex buffer to be transformed (see getRows)"""
+        if(rows is None):
+            np.matmul(self.nodes0, m.T, out=self.nodes1)
+        else:
+            self.nodes1[rows] = self.nodes0[rows] @ m.T
 
     def updateFaces(self):
         """ Rotate all cubelet with a quaternion (in reference to center) """
-        for c in self.cubelet:
-            c.updateFaces()
+        for idx in self.surface:
+            self.cubelet[idx].updateFaces()
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
@@ -166,6 +255,9 @@ class RubikSet:
         self.axis = rubikSetDef[3]
         self.axisDir = rubikSetDef[4]
         
+        # compiled flip permutations (see flipPerm), for direction: [0] clockwise, [1] c.clockwise
+        self.perm = [None, None]
+
         # if list of cubelets indexes is not defined, use the enire rubik
         if(self.cubelIdx == None):
             self.cubelIdx = range(rubikData.count)
@@ -183,46 +275,24 @@ class RubikSet:
         """ Flip the set 
         direction - direction of fliping: < 0 = clockwise, > 0 = c.clockwise """
         
-        if(self.cubelIdx90 == None):
+        if((self.cubelIdx90 is None) or ((direction * self.axisDir) == 0)):
             return
 
-        # Copy the color of each face for every cubelet from rubik to a temp list:
-        #   |<- Cub.0 ->| |<- Cub.1 ->|...
-        # [ [F,T,L,R,K,B],[F,T,L,R,K,B]...]
-        tempCubelet = []
-        for c in self.rubikData.data:
-            tempFaces = c.copy()
-            tempCubelet.append(tempFaces)
-
-        # Reassign the colors of each face for every cubelet
-        # based on the order specified in self.cubelIdx90
-        dst = None
-        src = None
-        if((direction * self.axisDir) > 0):
-            dst = self.cubelIdx90
-            src = self.cubelIdx
-        elif((direction * self.axisDir) < 0):
-            dst = self.cubelIdx
-            src = self.cubelIdx90
-        else:
-            return
-        
-        for idx_dst,idx_src in zip(dst, src):
-            c = self.rubikData.data[idx_dst]
-            for i,val in enumerate(tempCubelet[idx_src]):
-                c[i] = val
-            # flip faces for every cubelets
-            flipFunc = "flip" + self.axis
-            getattr(self.rubikData, flipFunc)(idx_dst, direction)
+        # Compile the flip (once for every direction) into a permutation of all faces
+        # of all cubelets and reassign the colors with a single gather
+        pidx = 0 if(direction < 0) else 1
+        if(self.perm[pidx] is None):
+            self.perm[pidx] = flipPerm(self.rubikData.count, 
+                (self.cubelIdx, self.cubelIdx90, self.cubelIdxCenter, self.axis, self.axisDir), direction)
+        data = self.rubikData.data.reshape(-1)
+        data[:] = data[self.perm[pidx]]
             
     def diff(self):
         """ Return a list of indexes of cubelets that are present in rubik
             but not present in this set: range(rubikData.count) - cubelIdx[] """
-        diffIdx = []
-        for idx in range(self.rubikData.count):
-            if idx not in self.cubelIdx:
-                diffIdx.append(idx)
-        return diffIdx
+        mask = np.ones(self.rubikData.count, dtype=bool)
+        mask[np.asarray(self.cubelIdx, dtype=np.intp)] = False
+        return np.flatnonzero(mask).tolist()
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
@@ -234,17 +304,25 @@ class RubikSetDraw(RubikSet):
         RubikSet.__init__(self, rubikExt, rubikSetDef)
         self.rubikExt = rubikExt
         
-        # create a list of cubelet from rubik containing in this set
-        self.cubelet = []
-        self.zOrder = []        # list stores tulpes: (<index in self.cubes>, <z>)
+        # create a list of cubelet from rubik containing in this set (only cubelets on surface)
+        self.cubelet = [c for c in (rubikExt.cubelet[idx] for idx in self.cubelIdx) if(c is not None)]
+        self.zOrder = [(idx, 0.0) for idx in range(len(self.cubelet))]  # list stores tulpes: (<index in self.cubes>, <z>)
         self.zDisplay = []      # list stores tulpes: (<index in self.cubes>, <z>)
-        for idx in self.cubelIdx:
-            c = rubikExt.cubelet[idx]
-            self.cubelet.append(c)
-            self.zOrder.append((len(self.cubelet) - 1, c.center1[2]))
-            
-        # set the center cubelet for this set
-        self.cubelCenter = rubikExt.cubelet[self.cubelIdxCenter]
+        # rows in rubik's vertex buffer used by the cubelets of this set
+        self.rows = rubikExt.getRows(self.cubelIdx)
+        # rows of cubelets centers (used to calculate the center of set)
+        self.centerRows = self.rows[8::cubelet.Cubelet.rowCount]
+        # dark box behind the cubelets of this set (the inside of rubik, visible through 
+        # the gaps between cubelets and on the cut planes to the rest of rubik)
+        self.box0 = rubikExt.getBox(self.axis, self.cubelIdx)
+        self.box1 = self.box0.copy()
+        # octant draw mode (see updateView): rotation matrix of set, visibility of faces [F,T,L,R,K,B],
+        # actual octant of view direction and the draw order of cubelets for every octant 
+        # (calculated the first time the octant is used)
+        self.matrix = np.identity(3)
+        self.faceVisible = [False] * 6
+        self.octant = 0
+        self.octantOrder = [None] * 8
             
     def updateZorder(self):
         """ update zOrder for this set """
@@ -254,27 +332,86 @@ class RubikSetDraw(RubikSet):
         # sort the zOrder buffer by Z value in reverse, (cubelets in the background are first in the list)
         self.zDisplay = sorted(self.zOrder, key=lambda tup: tup[1], reverse = True)
 
+    def updateView(self):
+        """ update visibility of faces and draw order for octant draw mode 
+            (replaces Cubelet.updateFaces and updateZorder). 
+            All cubelets of set are aligned to the axes of set: only the faces with the normal
+            pointing to viewer are visible (the same for all cubelets) and the back to front
+            order of cubelets on a grid depends only on the octant of the view direction """
+        # Z of the axes X, Y, Z of set after rotation (normals of faces R, B, K)
+        nz = self.matrix[2]
+        # face is visible if Z of its normal < 0
+        self.faceVisible = [nz[2] > 0, nz[1] > 0, nz[0] > 0, nz[0] < 0, nz[2] < 0, nz[1] < 0]
+        self.octant = int(nz[0] > 0) + 2 * int(nz[1] > 0) + 4 * int(nz[2] > 0)
+        if(self.octantOrder[self.octant] is None):
+            # back to front: on every axis first the layers far from viewer (ex: if Z of axis > 0 
+            # the cubelets with bigger coordinate on this axis are in background)
+            sign = [1.0 if(n > 0) else -1.0 for n in nz]
+            c = np.array([cub.center0 for cub in self.cubelet]).reshape(-1, 3)
+            self.octantOrder[self.octant] = np.lexsort(
+                (-sign[2] * c[:, 2], -sign[1] * c[:, 1], -sign[0] * c[:, 0])).tolist()
+
     def getZcenter(self):
-        """ Return the Z coordinate of the center cubelets for this set """
-        return self.cubelCenter.center1[2]
+        """ Return the Z coordinate of the center of this set 
+            (the average of centers of all cubelets in set) """
+        return self.rubikExt.nodes1[self.centerRows, 2].mean()
 
-    def draw(self, surface, offset):
-        """ draw the set of cubelets on surface """
+    def draw(self, surface, offset, octant = False):
+        """ draw the set of cubelets on surface 
+            octant - True: octant draw mode (see updateView), False: z-order draw mode (see updateZorder) """
+        if(octant):
+            self.drawBox(surface, offset, self.faceVisible)
+            for idx in self.octantOrder[self.octant]:
+                self.cubelet[idx].draw(surface, offset, self.faceVisible)
+            return
+        self.drawBox(surface, offset)
         for idx,z in self.zDisplay:
             c = self.cubelet[idx]
             c.draw(surface, offset)
             
+    def drawBox(self, surface, offset, visible = None):
+        """ draw the visible faces of the box behind cubelets on surface 
+            visible - optional visibility of faces [F,T,L,R,K,B] (see updateView) """
+        # Rendering layer: pygame is loaded only when drawing
+        import pygame
+        for f in range(0, 36, 6):
+            # face is visible if its normal points to viewer (on axis Z)
+            if((self.box1[f + 5][2] < self.box1[f + 4][2]) if(visible is None) else visible[f // 6]):
+                temp = [(offset[0] + n[0], offset[1] + n[1]) for n in self.box1[f : f + 4]]
+                pygame.draw.polygon(surface, cubelet.Cubelet.faceType[0], temp, 0)
+
+    def init0(self):
+        """ Init set (cubelets and box) to default position """
+        self.rubikExt.nodes1[self.rows] = self.rubikExt.nodes0[self.rows]
+        self.box1[:] = self.box0
+        self.matrix = np.identity(3)
+
     def rotate(self, q):
         """ rotate set with a quaternion """
-        for c in self.cubelet:
-            c.rotate(q)
+        m = q.get_matrix()
+        self.rubikExt.rotate(q, self.rows)
+        self.box1[:] = self.box1 @ m.T
+        self.matrix = m @ self.matrix
+
+    def transform(self, m):
+        """ transform set from init position 0 straight into rotated position
+            m - 3x3 rotation matrix (see RubikExt.transform) """
+        self.rubikExt.transform(m, self.rows)
+        np.matmul(self.box0, m.T, out=self.box1)
+        self.matrix = m
     
-    def mclick(self, pos):
+    def mclick(self, pos, octant = False):
         # Iterate through Z-order list in reverse: 
         # in this case first come cubelets in foreground, last come cubelets in background
-        for idx, z in reversed(self.zDisplay):
+        if(octant):
+            order = reversed(self.octantOrder[self.octant])
+            visible = self.faceVisible
+        else:
+            order = [idx for idx, z in reversed(self.zDisplay)]
+            visible = None
+        for idx in order:
             c = self.cubelet[idx]
-            if(c.isInsideXY(pos)):
+            if(c.isInsideXY(pos, visible)):
                 # Found, get its index in entire Rubik
                 # Iterate through Rubik and look for c cubelet
                 for i2,cRegExt in enumerate(self.rubikExt.cubelet):
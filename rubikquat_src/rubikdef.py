@@ -13,6 +13,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
+import os
+import pickle
+from . import rutils
+
 #----------------------------------------------------------------------------------------------
 # Rubik's Cube Definition: 3x3x3=27 Cubelets (0..26)
 #
@@ -189,3 +193,143 @@ c3x3_allz = ([  0,  1,  2,  3,  4,  5,  6,  7,  8,  9, 10, 11, 12, 13, 14, 15, 1
                 13,         # index of center cubelet of this set
                 "Z", 1)     # axis of the set, and direction (1 = normal/positive)
 #----------------------------------------------------------------------------------------------
+# Flipping Definitions: list of all sets which can be flipped,
+# the index in this list is the layer of a flip command (see cmdqueue.flipCmdDefMap)
+c3x3_flipDef = [c3x3_front,     # 0 = Front Rubik layer
+                c3x3_top,       # 1 = Top Rubik layer
+                c3x3_left,      # 2 = Left Rubik layer
+                c3x3_right,     # 3 = Right Rubik layer
+                c3x3_ally,      # 4 = Entire Rubik flip on Y axis
+                c3x3_allx,      # 5 = Entire Rubik flip on X axis
+                c3x3_allz]      # 6 = Entire Rubik flip on Z axis
+#----------------------------------------------------------------------------------------------
+# Generated NxNxN Rubik's Cube Definitions
+#
+# The cubelets are generated in the same order as c3x3 (for N=3 the list is identical):
+#   index = iy * N * N + iz * N + ix
+#   ix = 0..N-1 for X = -h..h, iy = 0..N-1 for Y = -h..h, iz = 0..N-1 for Z = h..-h, h = (N-1)/2
+#
+# The flipping sets (layers) are generated in the order of c3x3_flipDef, followed by
+# the layers which don't exist in the 3x3x3 definition:
+#   0 = Front, 1 = Top, 2 = Left, 3 = Right, 4 = All-Y, 5 = All-X, 6 = All-Z,
+#   7 = Back, 8 = Bottom, 
+#   9.. = inner slices on X axis (ix = 1..N-2), then on Y axis (iy = 1..N-2), 
+#         then on Z axis (iz = 1..N-2)
+#
+# Set after rotating 90 degrees (axis direction = 1), coordinates of cubelet (x, y, z) become:
+#   X axis: (x, z, -y)      Y axis: (-z, y, x)      Z axis: (y, -x, z)
+# Layers on the positive side of an axis (Right, Back, Bottom) use axis direction -1 (as c3x3_right).
+#----------------------------------------------------------------------------------------------
+# Version of generated definitions (part of the name of cached files)
+genVersion = 1
+
+# Rotation of coordinates for every axis (axis direction = 1)
+genRotate = {'X': lambda x, y, z: (x, z, -y),
+             'Y': lambda x, y, z: (-z, y, x),
+             'Z': lambda x, y, z: (y, -x, z)}
+
+# Generated definitions already loaded: size --> (cubelets, flipDef)
+_generated = {}
+
+def generate(n):
+    """ Return the definition of a NxNxN rubik as tuple (cubelets, flipDef), see c3x3 and c3x3_flipDef.
+        The definition is generated only once and memoized (also on disk, see rutils.getCacheDir) """
+    if(n in _generated):
+        return _generated[n]
+    
+    fileName = os.path.join(rutils.getCacheDir(), f'rubikdef_v{genVersion}_{n}.pickle')
+    rubikDef = _load(fileName, n)
+    if(rubikDef is None):
+        rubikDef = _generate(n)
+        try:
+            cached = {'version': genVersion, 'size': n, 'def': rubikDef}
+            rutils.writeFile(fileName, lambda f: pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL))
+        except OSError:
+            pass
+    
+    _generated[n] = rubikDef
+    return rubikDef
+
+def _load(fileName, n):
+    """ Return the definition of a NxNxN rubik loaded from cache file or None if the file
+        is missing or invalid (damaged, other version or size) """
+    try:
+        with open(fileName, 'rb') as f:
+            cached = pickle.load(f)
+        cubelets, flipDef = cached['def']
+        if((cached['version'] == genVersion) and (cached['size'] == n)
+        and (len(cubelets) == n ** 3) and (len(flipDef) == 9 + 3 * (n - 2))):
+            return cubelets, flipDef
+    except Exception:
+        pass
+    return None
+
+def _generate(n):
+    """ Generate the definition of a NxNxN rubik (see generate) """
+    if(n < 2):
+        raise Exception(f"Invalid rubik size {n}")
+    
+    # Coordinates on one axis: integers for odd size, halves for even size
+    h = (n - 1) / 2
+    coord = [(int(i - h) if((n % 2) == 1) else (i - h)) for i in range(n)]
+    
+    def index(x, y, z):
+        return int(round(y + h)) * n * n + int(round(h - z)) * n + int(round(x + h))
+    
+    # Cubelets and their face colors [F, T, L, R, K, B]
+    cubelets = []
+    for y in coord:
+        for z in reversed(coord):
+            for x in coord:
+                faces = [1 if(z == -h) else 0,
+                         2 if(y == -h) else 0,
+                         3 if(x == -h) else 0,
+                         4 if(x ==  h) else 0,
+                         5 if(z ==  h) else 0,
+                         6 if(y ==  h) else 0]
+                cubelets.append(((x, y, z), faces))
+    
+    def layer(axis, value):
+        """ Generate the set of all cubelets with coordinate on axis = value (None = entire rubik) """
+        axisIdx = 'XYZ'.index(axis)
+        axisDir = -1 if((value is not None) and (value > 0)) else 1
+        rot = genRotate[axis]
+        cubelIdx = []
+        cubelIdx90 = []
+        for pos, _ in cubelets:
+            if((value is not None) and (pos[axisIdx] != value)):
+                continue
+            cubelIdx.append(index(*pos))
+            # rotate (3 times for inversed axis direction)
+            p = pos
+            for i in range(1 if(axisDir > 0) else 3):
+                p = rot(*p)
+            cubelIdx90.append(index(*p))
+        # center cubelet of the set
+        c = [0.0, 0.0, 0.0]
+        if(value is not None):
+            c[axisIdx] = value
+        else:
+            c = [coord[n // 2]] * 3
+        center = index(*[min(coord, key=lambda v: abs(v - ci)) for ci in c])
+        return (cubelIdx, cubelIdx90, center, axis, axisDir)
+    
+    flipDef = [layer('Z', -h),      # 0 = Front
+               layer('Y', -h),      # 1 = Top
+               layer('X', -h),      # 2 = Left
+               layer('X',  h),      # 3 = Right
+               layer('Y', None),    # 4 = All-Y
+               layer('X', None),    # 5 = All-X
+               layer('Z', None),    # 6 = All-Z
+               layer('Z',  h),      # 7 = Back
+               layer('Y',  h)]      # 8 = Bottom
+    # Inner slices
+    for axis in 'XYZ':
+        values = coord[1:-1]
+        if(axis == 'Z'):
+            values = list(reversed(values))
+        for v in values:
+            flipDef.append(layer(axis, v))
+    
+    return (cubelets, flipDef)
+#----------------------------------------------------------------------------------------------
@@ -20,6 +20,9 @@ from .resman import ResourceManager
 from .buttons import ActionList
 from .buttons import ButtonList
 from .rutils import isPointInsideRect
+from . import solver
+from . import solver2x2
+from . import seqcomp
 
 # ##############################################################################
 # Refresh Flags
@@ -52,23 +55,26 @@ class RefreshArea:
 # ###############################################################################
 class RubikQuat:
 
-    def __init__(self, width, height, path):
+    def __init__(self, width, height, path, size = 3):
         self.width = width
         self.height = height
         self.surface = pygame.display.set_mode((width, height))
         pygame.display.set_caption('RubikQuat')
         self.backColor = (10,10,50)
         self.quitFlag = False
+        # Frame rate (animations are time-based: a lower frame rate doesn't slow them down)
+        self.fps = 60
         
         # create resource manager and load tiles
         self.resMan = ResourceManager(path)
         self.resMan.loadTiles()
         
         # create rubik engine
-        self.reng = RubikEngine(self.resMan, (width - 96, height - 128), self.surface, self.backColor)
+        self.reng = RubikEngine(self.resMan, (width - 96, height - 128), self.surface, self.backColor, size)
         
         # create command manager
         self.cmdMan = CmdManager(self.resMan, width)
+        self.cmdMan.compiler = seqcomp.getCompiler(size)
         
         # create actions
         self.actList = ActionList()
@@ -98,6 +104,7 @@ class RubikQuat:
         self.actList.add(pygame.K_s,        None,               self.cmdMan,    'scramble', [10])       #22
         self.actList.add(pygame.K_h,        None,               self.cmdMan,    'out',      None)       #23
         self.actList.add(pygame.K_F1,       None,               self,           'showHelp', None)       #24
+        self.actList.add(pygame.K_s,        pygame.KMOD_SHIFT,  self,           'solve',    None)       #25
         
         # create buttons
         h = height - 32
@@ -170,7 +177,7 @@ class RubikQuat:
         clock = pygame.time.Clock()
         
         while not self.quitFlag:
-            clock.tick(60)
+            clock.tick(self.fps)
             for event in pygame.event.get():
                 if(event.type == pygame.QUIT):
                     self.quitFlag = True
@@ -237,15 +244,32 @@ class RubikQuat:
 
             # Check if Rubik not busy (not flipping) and execute next command
             if(not self.reng.isFlipping()):
+                # Too many commands waiting: apply all of them without animation
+                if(self.reng.isInstant(self.cmdMan.pendingCount())):
+                    cmdNext = self.cmdMan.getNextCmd()
+                    while(cmdNext != None):
+                        self.reng.applyFlip(cmdNext[0], cmdNext[1])
+                        cmdNext = self.cmdMan.getNextCmd()
+                    self.cmdMan.updateSurface()
+                    self.refresh.all()
                 cmdNext = self.cmdMan.getNextCmd()
                 if(cmdNext != None):
                     self.reng.reqFlip(cmdNext[0], cmdNext[1])
+                    # Add the following commands which can be animated together
+                    # (the same layer or commuting layers, see RubikEngine.addFlip)
+                    cmdNext = self.cmdMan.peekNextCmd()
+                    while((cmdNext != None) and self.reng.addFlip(cmdNext[0], cmdNext[1])):
+                        self.cmdMan.getNextCmd()
+                        cmdNext = self.cmdMan.peekNextCmd()
+                    # The more commands waiting the faster the flips
+                    self.reng.setQueueDepth(self.cmdMan.pendingCount())
                     self.cmdMan.updateSurface()
                     self.refresh.all()
             
             # Process Rengine and refresh display if necessarily
-            if(self.reng.process()):
-                self.reng.rotate()
+            dirty = self.reng.process()
+            if(dirty):
+                self.reng.rotate(dirty)
                 self.refresh.rubik = True
                 
             # Display to be refreshed?
@@ -253,6 +277,22 @@ class RubikQuat:
                 self.display()  
                 pygame.display.flip()
 
+    def solve(self):
+        """ Solve the Rubik (only 2x2x2 and 3x3x3): add the solution to command manager,
+        the tables of solver are generated at the first call (saved on disk) """
+        # The solution is found for the current state: wait until all commands are executed
+        if((self.reng.size not in (2, 3)) or self.reng.isFlipping() or (self.cmdMan.pendingCount() > 0)):
+            return
+        try:
+            if(self.reng.size == 2):
+                cmds = solver2x2.getSolver2x2().solveData(self.reng.rubik)
+            else:
+                cmds = solver.getSolver().solveData(self.reng.rubik)
+        except ValueError:
+            return
+        if(cmds is not None):
+            self.cmdMan.flipSeq(cmds)
+
     def showHelp(self):
         """ Show help screen """
         self.resMan.draw(self.surface, 36, 0, 0)
@@ -13,6 +13,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
+import os
 
 # Source from:
 #http://www.petercollingridge.co.uk/tutorials/3d/pygame/basic-transformations/
@@ -58,5 +59,25 @@ def isPointInsideRect(rectPoint0, rectPoint1, point):
             return True
             
     return False
-        
-    
\ No newline at end of file
+
+def getCacheDir():
+    """ Return the directory used to cache generated data (rubik definitions, tables),
+        defined by environment variable RUBIKQUAT_CACHE, default: ~/.rubikquat
+        The directory is created if it doesn't exist """
+    path = os.environ.get('RUBIKQUAT_CACHE', os.path.join(os.path.expanduser('~'), '.rubikquat'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def writeFile(fileName, write):
+    """ Write a file atomically: the data is written in a temporary file which replaces
+        fileName when complete (an interrupted write never leaves a truncated file)
+        fileName - the name of file
+        write - function write(f) which writes the data in the open file (binary) """
+    tmpName = f'{fileName}.{os.getpid()}.tmp'
+    try:
+        with open(tmpName, 'wb') as f:
+            write(f)
+        os.replace(tmpName, fileName)
+    finally:
+        if(os.path.exists(tmpName)):
+            os.remove(tmpName)
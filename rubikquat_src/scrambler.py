@@ -0,0 +1,150 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import sys
+import json
+import multiprocessing
+import numpy as np
+from . import solver
+from .solver import CubieCube, permParity
+
+#------------------------------------------------------------------------------
+# Scrambler (3x3x3)
+# A random-move scramble doesn't reach all states with the same probability,
+# the scrambler samples uniformly random legal states (CubieCube):
+#
+#       corners and edges: random permutations, if their parities differ the
+#                          last two edges are swapped (a bijection odd <--> even)
+#       orientations:      random, the last corner and edge complete the sums
+#                          (twist multiple of 3, flip multiple of 2)
+#
+# and the scramble is the inverse of the flip commands of the solution of the
+# state (see solver): the commands in reverse order, every one in the other
+# direction (f <--> F, also the whole-cube rotations x <--> X).
+#
+# Reproducible: the scramble with index i is generated with its own generator
+# seeded with (seed, i) and the solver returns the first solution it finds
+# not longer than maxLength (no timeout), the result doesn't depend on the
+# count of processes.
+#
+# The scrambles are streamed (generator), or written in a file:
+#       JSONL:  one line for every scramble {"index": i, "scramble": "ruuX..."}
+#       binary: one record for every scramble [count, move, move, ...] (uint8),
+#               move = index of move of facelet model (see facelet.FaceletModel)
+#------------------------------------------------------------------------------
+class Scrambler:
+    """ Scrambler - scrambles of uniformly random states """
+
+    def __init__(self, seed = 0, maxLength = 30):
+        """ Initialize scrambler
+            seed - seed of random generators
+            maxLength - longest solution accepted (shorter scrambles, slower) """
+        self.seed = seed
+        self.maxLength = maxLength
+        self.solver = solver.getSolver()
+        self.cmdMove = self.solver.compiler.cmdMove
+
+    def randomCube(self, index):
+        """ Return the uniformly random CubieCube of scramble index """
+        rng = np.random.default_rng([self.seed, index])
+        cube = CubieCube(rng.permutation(8).tolist(), rng.integers(0, 3, 8).tolist(),
+                         rng.permutation(12).tolist(), rng.integers(0, 2, 12).tolist())
+        if(permParity(cube.cp) != permParity(cube.ep)):
+            cube.ep[10], cube.ep[11] = cube.ep[11], cube.ep[10]
+        cube.co[7] = -sum(cube.co[:7]) % 3
+        cube.eo[11] = sum(cube.eo[:11]) % 2
+        return cube
+
+    def scramble(self, index):
+        """ Return the scramble index as a list of flip commands (see cmdqueue.flipCmdList) """
+        moves = self.solver.solveCubie(self.randomCube(index), self.maxLength, None)
+        if(moves is None):
+            raise RuntimeError(f"No solution found for scramble {index}")
+        # inverse of solution: the commands in reverse order, every command (also the whole-cube
+        # rotations) in the other direction, after the scramble the solution brings the rubik
+        # back in its initial orientation
+        return [cmd.swapcase() for cmd in reversed(self.solver.toCommands(moves))]
+
+    def scrambleMoves(self, index):
+        """ Return the scramble index as uint8 array of moves of facelet model """
+        return np.array([self.cmdMove[cmd] for cmd in self.scramble(index)], dtype=np.uint8)
+
+#------------------------------------------------------------------------------
+# Worker process: one scrambler for every process
+_scrambler = None
+
+def initWorker(seed, maxLength):
+    """ Initialize a worker: create its scrambler (the solver tables are memory-mapped) """
+    global _scrambler
+    _scrambler = Scrambler(seed, maxLength)
+
+def scrambleWorker(index):
+    """ Return (index, scramble) generated by the worker """
+    return index, _scrambler.scramble(index)
+
+def scrambles(count, seed = 0, workers = 1, start = 0, maxLength = 30, block = 1024):
+    """ Generator of scrambles: (index, list of flip commands) in index order
+        count - count of scrambles
+        seed - seed of random generators
+        workers - count of processes (None: count of CPUs)
+        start - index of the first scramble (ex: continue a stream)
+        block - count of scrambles generated at once by the pool (bounds the memory) """
+    indexes = range(start, start + count)
+    # the solver tables are generated (if missing) by this process, never by the workers at once
+    solver.getSolver()
+    if((workers is not None) and (workers <= 1)):
+        scrambler = Scrambler(seed, maxLength)
+        for index in indexes:
+            yield index, scrambler.scramble(index)
+        return
+    with multiprocessing.Pool(workers, initWorker, (seed, maxLength)) as pool:
+        for i in range(0, count, block):
+            yield from pool.imap(scrambleWorker, indexes[i : i + block], chunksize=8)
+
+def writeJsonl(fileName, count, seed = 0, workers = 1, start = 0, maxLength = 30):
+    """ Write scrambles in a JSONL file (see scrambles) """
+    with open(fileName, 'w') as f:
+        for index, cmds in scrambles(count, seed, workers, start, maxLength):
+            f.write(json.dumps({'index': index, 'scramble': ''.join(cmds)}) + '\n')
+
+def writeBinary(fileName, count, seed = 0, workers = 1, start = 0, maxLength = 30):
+    """ Write scrambles in a binary file: [count, move, move, ...] for every scramble,
+        count is 2 bytes (little endian), every move 1 byte """
+    cmdMove = solver.getSolver().compiler.cmdMove
+    with open(fileName, 'wb') as f:
+        for index, cmds in scrambles(count, seed, workers, start, maxLength):
+            f.write(len(cmds).to_bytes(2, 'little') + bytes([cmdMove[cmd] for cmd in cmds]))
+
+def readBinary(fileName):
+    """ Generator of scrambles of a binary file: uint8 array of moves of facelet model """
+    if(os.path.getsize(fileName) == 0):
+        return
+    data = np.memmap(fileName, dtype=np.uint8, mode='r')
+    pos = 0
+    while(pos < len(data)):
+        count = int(data[pos]) | (int(data[pos + 1]) << 8)
+        yield np.array(data[pos + 2 : pos + 2 + count])
+        pos += 2 + count
+
+#------------------------------------------------------------------------------
+# Generate scrambles: python -m rubikquat_src.scrambler count seed file.jsonl|file.bin [workers]
+if __name__ == '__main__':
+    count, seed, fileName = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+    workers = int(sys.argv[4]) if(len(sys.argv) > 4) else None
+    if(fileName.endswith('.jsonl')):
+        writeJsonl(fileName, count, seed, workers)
+    else:
+        writeBinary(fileName, count, seed, workers)
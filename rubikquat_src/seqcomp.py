@@ -0,0 +1,151 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from . import facelet
+from .cmdqueue import flipCmdList, flipCmdDefMap
+
+#------------------------------------------------------------------------------
+# Sequence Compiler
+# A sequence of flip commands (see cmdqueue.flipCmdList) is compiled into the
+# shortest equivalent sequence (the same final state, also the orientation):
+#
+#   1. whole-cube rotations are folded into the frame (see facelet.FaceletModel),
+#      every layer move is remapped to the layer it turns in frame 0
+#   2. consecutive moves on the same axis commute (disjoint layers): they are
+#      collected in a block, the turns of every layer are added modulo 4
+#      (cancels "u U", folds "f f f f" and "r r r" --> "R"), an empty block is
+#      removed and the moves around it are merged again
+#   3. the moves of a block are emitted in canonical order (by layer),
+#      one turn as one command, two turns as two commands
+#   4. the layers without flip command (ex: back, bottom) are reached with
+#      whole-cube rotations, at the end rotations bring the rubik in the
+#      final orientation
+#
+#       "x u U f f f X l r"  -->  "U l r"
+#
+# Sequences of the same length are also brought in canonical order:
+# equivalent sequences compile to the same commands.
+#------------------------------------------------------------------------------
+class SeqCompiler:
+    """ Sequence Compiler - cancels and merges redundant flip commands """
+
+    def __init__(self, model = None):
+        """ Initialize compiler
+            model - facelet model of rubik (default: 3x3x3) """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.cmdMove = {c: model.moveIndex(flipCmdDefMap[c][0], flipCmdDefMap[c][1]) for c in flipCmdList}
+        self.rotationCmds = [c for c in flipCmdList if(model.isWhole[self.cmdMove[c]])]
+        # frameCmd[frame] - the flip command of every move (in frame 0) for rubik in frame
+        self.frameCmd = [{int(model.frameMove[f, move]): c for c, move in self.cmdMove.items()
+                          if(not model.isWhole[move])} for f in range(len(model.frames))]
+        # Axis of every layer ('X', 'Y', 'Z')
+        self.layerAxis = [setDef[3] for setDef in model.flipDef]
+        self.buildRotations()
+
+    def buildRotations(self):
+        """ Build rotPath[f][g]: the shortest list of rotation commands from frame f to frame g """
+        model = self.model
+        frames = len(model.frames)
+        self.rotPath = []
+        for f in range(frames):
+            path = [None] * frames
+            path[f] = []
+            queue = [f]
+            for g in queue:
+                for c in self.rotationCmds:
+                    h = int(model.frameMul[g, self.cmdMove[c]])
+                    if(path[h] is None):
+                        path[h] = path[g] + [c]
+                        queue.append(h)
+            self.rotPath.append(path)
+
+    def toMoves(self, cmds, frame = 0):
+        """ Return the layer moves (in frame 0) of flip commands and the final frame """
+        model = self.model
+        moves = []
+        for cmd in cmds:
+            move = self.cmdMove[cmd]
+            if(model.isWhole[move]):
+                frame = int(model.frameMul[frame, move])
+            else:
+                moves.append(int(model.frameMove[frame, move]))
+        return moves, frame
+
+    def simplify(self, moves):
+        """ Return the shortest equivalent list of layer moves (in canonical order) """
+        # blocks of moves on the same axis: [axis, {layer: turns}]
+        blocks = []
+        for move in moves:
+            layer, direction = self.model.moveCmd(move)
+            axis = self.layerAxis[layer]
+            if((not blocks) or (blocks[-1][0] != axis)):
+                blocks.append([axis, {}])
+            turns = blocks[-1][1]
+            turns[layer] = (turns.get(layer, 0) + (1 if(direction > 0) else 3)) % 4
+            if(turns[layer] == 0):
+                del turns[layer]
+                if(not turns):
+                    blocks.pop()
+
+        result = []
+        for axis, turns in blocks:
+            for layer in sorted(turns):
+                if(turns[layer] == 3):
+                    result.append(self.model.moveIndex(layer, -1))
+                else:
+                    result += [self.model.moveIndex(layer, 1)] * turns[layer]
+        return result
+
+    def toCommands(self, moves, frame = 0, endFrame = None):
+        """ Return the flip commands of layer moves (in frame 0)
+            frame - the orientation of rubik before the moves
+            endFrame - the orientation of rubik after the commands (None: any)
+            raise ValueError if a move can't be done with flip commands """
+        cmds = []
+        for move in moves:
+            if(move not in self.frameCmd[frame]):
+                # the nearest frame where the layer has a flip command
+                frames = [f for f in range(len(self.frameCmd)) if(move in self.frameCmd[f])]
+                if(not frames):
+                    raise ValueError(f"No flip command for move {move}")
+                rest = (lambda f: len(self.rotPath[f][endFrame])) if(endFrame is not None) else (lambda f: 0)
+                nearest = min(frames, key=lambda f: (len(self.rotPath[frame][f]), rest(f)))
+                cmds += self.rotPath[frame][nearest]
+                frame = nearest
+            cmds.append(self.frameCmd[frame][move])
+        if(endFrame is not None):
+            cmds += self.rotPath[frame][endFrame]
+        return cmds
+
+    def compile(self, cmds):
+        """ Return the shortest equivalent list of flip commands in canonical order
+            (the same final state and orientation), cmds is returned unchanged only
+            if the canonical sequence is longer (rotations needed to reach layers) """
+        cmds = list(cmds)
+        moves, frame = self.toMoves(cmds)
+        result = self.toCommands(self.simplify(moves), 0, frame)
+        return result if(len(result) <= len(cmds)) else cmds
+
+#------------------------------------------------------------------------------
+# Compilers already created: size --> SeqCompiler
+_compilers = {}
+
+def getCompiler(n = 3):
+    """ Return the sequence compiler of a NxNxN rubik (see facelet.getModel) """
+    if(n not in _compilers):
+        _compilers[n] = SeqCompiler(facelet.getModel(n))
+    return _compilers[n]
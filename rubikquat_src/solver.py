@@ -0,0 +1,525 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import time
+import itertools
+import numpy as np
+from . import facelet
+from . import rutils
+from . import tablegen
+from . import seqcomp
+
+#------------------------------------------------------------------------------
+# Two-Phase Solver (Kociemba) for 3x3x3
+# The state of rubik is reduced to cubies: the permutation and orientation
+# of 8 corners and 12 edges (CubieCube), in the standard order:
+#
+#       corners: URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+#       edges:   UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+#
+# Faces of rubik in rubik coordinates (cubelet faces [F,T,L,R,K,B]):
+#       U: y = -1 (T), D: y = +1 (B), L: x = -1 (L), R: x = +1 (R),
+#       F: z = -1 (F), B: z = +1 (K)
+#
+# Phase 1 brings the rubik in the subgroup G1 = <U, D, R2, L2, F2, B2>
+# (corners and edges oriented, the slice edges FR, FL, BL, BR in the slice),
+# phase 2 solves the rubik with moves of G1. Both phases are IDA* searches
+# over coordinates (small integers) with move tables (coordinate x move -->
+# coordinate) and pruning tables (distance to goal, a lower bound):
+#
+#       phase 1: twist (2187) x slice (495), flip (2048) x slice (495)
+#       phase 2: corners (40320) x slicePerm (24), udEdges (40320) x slicePerm (24)
+#
+# The tables are generated once, saved in the cache directory (see
+# rutils.getCacheDir) and loaded memory-mapped (numpy.load mmap_mode='r'):
+# the pages are loaded on demand and shared by all processes.
+#
+# Moves: move = face * 3 + power, faces U, R, F, D, L, B, power 0 = one turn
+# (the flip command of layer with direction +1: clockwise for U, F, L and
+# counterclockwise for R, B, D), 1 = two turns, 2 = three turns (the other
+# direction).
+#------------------------------------------------------------------------------
+
+# Version of tables: increment it when the format of the tables changes
+tablesVersion = 1
+
+faceNames = 'URFDLB'
+
+# Layer (index in flip definition list of rubikdef.generate) of faces U, R, F, D, L, B
+faceLayer = [1, 3, 0, 8, 2, 7]
+
+# Normal and index of face in cubelet faces [F,T,L,R,K,B] for every face name
+faceNormal = {'U': (0, -1, 0), 'R': (1, 0, 0), 'F': (0, 0, -1), 'D': (0, 1, 0), 'L': (-1, 0, 0), 'B': (0, 0, 1)}
+faceCubelet = {'U': 1, 'R': 3, 'F': 0, 'D': 5, 'L': 2, 'B': 4}
+
+# Faces of corners (clockwise, starting with U/D face) and edges
+cornerNames = ['URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB']
+edgeNames = ['UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR']
+
+# Moves allowed in phase 2: U, D (all powers), R2, F2, L2, B2
+phase2Moves = [0, 1, 2, 4, 7, 9, 10, 11, 13, 16]
+
+# Coordinate sizes
+N_TWIST = 2187
+N_FLIP = 2048
+N_SLICE = 495
+N_PERM8 = 40320
+N_PERM4 = 24
+
+# Binomial coefficients used by the slice coordinate
+_comb = [[0] * 13 for i in range(13)]
+for _n in range(13):
+    for _k in range(_n + 1):
+        _comb[_n][_k] = 1 if(_k in (0, _n)) else _comb[_n - 1][_k - 1] + _comb[_n - 1][_k]
+
+def permRank(perm):
+    """ Return the rank of a permutation (its index in lexicographic order) """
+    n = len(perm)
+    rank = 0
+    for i in range(n):
+        rank = rank * (n - i) + sum(1 for j in range(i + 1, n) if(perm[j] < perm[i]))
+    return rank
+
+def permParity(perm):
+    """ Return the parity of a permutation: 0 (even) or 1 (odd) """
+    n = len(perm)
+    return sum(1 for i in range(n) for j in range(i + 1, n) if(perm[j] < perm[i])) % 2
+
+def permRankMany(perms):
+    """ Return the ranks of permutations (every row of perms array is a permutation) """
+    n = perms.shape[1]
+    rank = np.zeros(len(perms), dtype=np.int64)
+    for i in range(n):
+        rank = rank * (n - i) + (perms[:, i + 1:] < perms[:, i:i + 1]).sum(axis=1)
+    return rank
+
+def sliceCode(occupied):
+    """ Return the slice coordinate (0..494) from the 12 flags: True for positions
+        occupied by a slice edge (FR, FL, BL, BR) """
+    code = 0
+    x = 0
+    for j in range(11, -1, -1):
+        if(occupied[j]):
+            code += _comb[11 - j][x + 1]
+            x += 1
+    return code
+
+#------------------------------------------------------------------------------
+# Cubie Cube
+#------------------------------------------------------------------------------
+class CubieCube:
+    """ Cubie Cube - permutation and orientation of corners and edges:
+        cp[i] - the corner at position i, co[i] - its orientation (0..2)
+        ep[i] - the edge at position i, eo[i] - its orientation (0..1) """
+
+    def __init__(self, cp = None, co = None, ep = None, eo = None):
+        self.cp = list(range(8)) if(cp is None) else list(cp)
+        self.co = [0] * 8 if(co is None) else list(co)
+        self.ep = list(range(12)) if(ep is None) else list(ep)
+        self.eo = [0] * 12 if(eo is None) else list(eo)
+
+    def __eq__(self, b):
+        return (self.cp == b.cp) and (self.co == b.co) and (self.ep == b.ep) and (self.eo == b.eo)
+
+    def multiply(self, b):
+        """ Return the cube obtained applying b to this cube """
+        return CubieCube([self.cp[j] for j in b.cp],
+                         [(self.co[j] + o) % 3 for j, o in zip(b.cp, b.co)],
+                         [self.ep[j] for j in b.ep],
+                         [(self.eo[j] + o) % 2 for j, o in zip(b.ep, b.eo)])
+
+    def verify(self):
+        """ Raise ValueError if the cube can't be solved """
+        if(sorted(self.cp) != list(range(8))):
+            raise ValueError("Invalid corners: some corners are missing")
+        if(sorted(self.ep) != list(range(12))):
+            raise ValueError("Invalid edges: some edges are missing")
+        if(sum(self.co) % 3 != 0):
+            raise ValueError("Invalid corners: a corner is twisted")
+        if(sum(self.eo) % 2 != 0):
+            raise ValueError("Invalid edges: an edge is flipped")
+        if(permParity(self.cp) != permParity(self.ep)):
+            raise ValueError("Invalid parity: two pieces are swapped")
+
+    def getTwist(self):
+        twist = 0
+        for o in self.co[:7]:
+            twist = twist * 3 + o
+        return twist
+
+    def getFlip(self):
+        flip = 0
+        for o in self.eo[:11]:
+            flip = flip * 2 + o
+        return flip
+
+    def getSlice(self):
+        return sliceCode([e >= 8 for e in self.ep])
+
+    def getCorners(self):
+        return permRank(self.cp)
+
+    def getUdEdges(self):
+        return permRank(self.ep[:8])
+
+    def getSlicePerm(self):
+        return permRank([e - 8 for e in self.ep[8:]])
+
+#------------------------------------------------------------------------------
+# Tables generation
+#------------------------------------------------------------------------------
+def twistMoveTable(moves):
+    """ Return the (twist, move) table of twist coordinate after every move """
+    weights = 3 ** np.arange(6, -1, -1)
+    co = (np.arange(N_TWIST)[:, None] // weights) % 3
+    co = np.hstack((co, (-co.sum(axis=1, keepdims=True)) % 3))
+    table = np.empty((N_TWIST, len(moves)), dtype=np.int32)
+    for m, cube in enumerate(moves):
+        table[:, m] = ((co[:, cube.cp] + cube.co) % 3)[:, :7] @ weights
+    return table
+
+def flipMoveTable(moves):
+    """ Return the (flip, move) table of flip coordinate after every move """
+    weights = 2 ** np.arange(10, -1, -1)
+    eo = (np.arange(N_FLIP)[:, None] // weights) % 2
+    eo = np.hstack((eo, eo.sum(axis=1, keepdims=True) % 2))
+    table = np.empty((N_FLIP, len(moves)), dtype=np.int32)
+    for m, cube in enumerate(moves):
+        table[:, m] = ((eo[:, cube.ep] + cube.eo) % 2)[:, :11] @ weights
+    return table
+
+def sliceMoveTable(moves):
+    """ Return the (slice, move) table of slice coordinate after every move """
+    occupied = np.zeros((N_SLICE, 12), dtype=bool)
+    for pos in itertools.combinations(range(12), 4):
+        flags = [p in pos for p in range(12)]
+        occupied[sliceCode(flags)] = flags
+    table = np.empty((N_SLICE, len(moves)), dtype=np.int32)
+    for m, cube in enumerate(moves):
+        table[:, m] = [sliceCode(flags) for flags in occupied[:, cube.ep]]
+    return table
+
+def permMoveTable(n, perms):
+    """ Return the (rank, move) table of permutations of n elements after every move
+        perms - the permutation of elements (0..n-1) done by every move """
+    states = np.array(list(itertools.permutations(range(n))), dtype=np.int8)
+    table = np.empty((len(states), len(perms)), dtype=np.int32)
+    for m, perm in enumerate(perms):
+        table[:, m] = permRankMany(states[:, perm])
+    return table
+
+# Pruning tables: name --> (move table of coordinate a, move table of coordinate b)
+# the goal of all of them is (0, 0): phase 1 slice coordinate of goal is 0
+pruneDefs = {'pruneTwist': ('twist', 'slice'),
+             'pruneFlip': ('flip', 'slice'),
+             'pruneCorners': ('corners', 'slicePerm'),
+             'pruneEdges': ('udEdges', 'slicePerm')}
+
+def buildMoveTables(moves):
+    """ Return the dictionary of move tables: name --> numpy array
+        moves - the 18 moves (CubieCube) """
+    p2 = [moves[m] for m in phase2Moves]
+    tables = {}
+    tables['twist'] = twistMoveTable(moves)
+    tables['flip'] = flipMoveTable(moves)
+    tables['slice'] = sliceMoveTable(moves)
+    tables['corners'] = permMoveTable(8, [cube.cp for cube in p2])
+    tables['udEdges'] = permMoveTable(8, [cube.ep[:8] for cube in p2])
+    tables['slicePerm'] = permMoveTable(4, [[e - 8 for e in cube.ep[8:]] for cube in p2])
+    return tables
+
+def buildTables(moves):
+    """ Return the dictionary of all move and pruning tables generated in memory """
+    tables = buildMoveTables(moves)
+    for name, (a, b) in pruneDefs.items():
+        tables[name] = tablegen.pruneTable(tables[a], tables[b])
+    return tables
+
+#------------------------------------------------------------------------------
+# Solver
+#------------------------------------------------------------------------------
+class Solver:
+    """ Two-Phase Solver - solves a 3x3x3 rubik in about 20-25 moves """
+
+    # Longest phase 2 searched: longer phase 2 searches are slower than trying other phase 1 sequences
+    phase2Length = 12
+
+    tableNames = ['twist', 'flip', 'slice', 'corners', 'udEdges', 'slicePerm',
+                  'pruneTwist', 'pruneFlip', 'pruneCorners', 'pruneEdges']
+
+    def __init__(self, model = None, workers = 1):
+        """ Initialize solver: load the tables (generate and save them if missing)
+            model - facelet model of a 3x3x3 rubik (default: facelet.getModel(3))
+            workers - count of processes generating the pruning tables (see tablegen) """
+        if(model is None):
+            model = facelet.getModel(3)
+        self.model = model
+        self.workers = workers
+        self.initStickers()
+
+        # The 18 moves as cubie cubes, extracted from the compiled moves of facelet model
+        self.faceMoves = [model.moveIndex(layer, 1) for layer in faceLayer]
+        self.moves = []
+        for move in self.faceMoves:
+            cube = CubieCube()
+            turn = self.toCubie(model.apply(model.solved, move))
+            for power in range(3):
+                cube = cube.multiply(turn)
+                self.moves.append(cube)
+
+        self.tables = self.loadTables()
+        # Memory views (of memory-mapped tables) have fast access to single elements
+        self.views = {name: memoryview(np.ascontiguousarray(t).reshape(-1)) for name, t in self.tables.items()}
+
+        # Translation of moves to flip commands (see toCommands)
+        self.compiler = seqcomp.SeqCompiler(model)
+
+    def initStickers(self):
+        """ Initialize the indexes of stickers of every corner, edge and face center """
+        model = self.model
+        pos = {tuple(cDef[0]): idx for idx, cDef in enumerate(model.rubikDef)}
+        slotSticker = {slot: sticker for sticker, slot in enumerate(model.slots)}
+
+        def stickers(names):
+            p = tuple(map(sum, zip(*(faceNormal[f] for f in names))))
+            return [slotSticker[pos[p] * 6 + faceCubelet[f]] for f in names]
+
+        self.cornerStickers = [stickers(names) for names in cornerNames]
+        self.edgeStickers = [stickers(names) for names in edgeNames]
+        self.centerStickers = [stickers(f)[0] for f in faceNames]
+
+    def toCubie(self, stickers):
+        """ Return the CubieCube of stickers (see facelet.FaceletModel),
+            the colors of faces are the colors of face centers (any orientation of rubik)
+            raise ValueError if the stickers are not a valid rubik """
+        colorFace = {int(stickers[s]): f for f, s in zip(faceNames, self.centerStickers)}
+        if(len(colorFace) != 6):
+            raise ValueError("Invalid rubik: the face centers don't have distinct colors")
+        try:
+            cube = CubieCube()
+            for i, idx in enumerate(self.cornerStickers):
+                names = ''.join(colorFace[int(stickers[s])] for s in idx)
+                ori = min(names.find('U') % 4, names.find('D') % 4)
+                cube.cp[i] = cornerNames.index(names[ori:] + names[:ori])
+                cube.co[i] = ori
+            for i, idx in enumerate(self.edgeStickers):
+                names = ''.join(colorFace[int(stickers[s])] for s in idx)
+                if(names in edgeNames):
+                    cube.ep[i], cube.eo[i] = edgeNames.index(names), 0
+                else:
+                    cube.ep[i], cube.eo[i] = edgeNames.index(names[::-1]), 1
+        except (KeyError, ValueError):
+            raise ValueError("Invalid rubik: unknown corner or edge colors")
+        cube.verify()
+        return cube
+
+    def tableShape(self, name):
+        """ Return the shape of a table: (coordinate, move) for move tables, (a * b) for pruning tables """
+        sizes = {'twist': N_TWIST, 'flip': N_FLIP, 'slice': N_SLICE,
+                 'corners': N_PERM8, 'udEdges': N_PERM8, 'slicePerm': N_PERM4}
+        if(name in pruneDefs):
+            a, b = pruneDefs[name]
+            return (sizes[a] * sizes[b],)
+        return (sizes[name], 18 if(name in ('twist', 'flip', 'slice')) else len(phase2Moves))
+
+    def loadTable(self, fileName, name):
+        """ Return a table loaded memory-mapped or None if the file is missing or invalid
+            (ex: truncated, other shape) """
+        try:
+            table = np.load(fileName, mmap_mode='r')
+            if(table.shape == self.tableShape(name)):
+                return table
+        except (OSError, ValueError, EOFError):
+            pass
+        return None
+
+    def loadTables(self):
+        """ Return the tables loaded memory-mapped from cache directory,
+            the missing or invalid tables are generated and saved """
+        path = rutils.getCacheDir()
+        fileName = lambda name: os.path.join(path, f'solver_v{tablesVersion}_{name}.npy')
+        tables = {name: self.loadTable(fileName(name), name) for name in self.tableNames}
+        if(all(table is not None for table in tables.values())):
+            return tables
+
+        # Move tables saved first (written atomically): the pruning tables are generated from the files
+        try:
+            moveTables = None
+            for name in self.tableNames:
+                if((name not in pruneDefs) and (tables[name] is None)):
+                    if(moveTables is None):
+                        moveTables = buildMoveTables(self.moves)
+                    rutils.writeFile(fileName(name), lambda f: np.save(f, moveTables[name]))
+                    tables[name] = self.loadTable(fileName(name), name)
+            for name, (a, b) in pruneDefs.items():
+                if(tables[name] is None):
+                    tablegen.buildPruneTable(fileName(name), fileName(a), fileName(b), workers=self.workers)
+                    tables[name] = self.loadTable(fileName(name), name)
+            if(any(table is None for table in tables.values())):
+                raise ValueError("Invalid solver tables")
+            return tables
+        except (OSError, ValueError):
+            return buildTables(self.moves)
+
+    def solve(self, stickers, maxLength = 22, timeout = 0.5):
+        """ Return the solution (list of moves) of a 3x3x3 rubik
+            stickers - the state of rubik (see facelet.FaceletModel)
+            maxLength - a solution with at most maxLength moves is returned as soon as it is found
+            timeout - after timeout seconds the shortest solution found is returned (the search
+                      continues until the first solution is found)
+            raise ValueError if the stickers are not a valid rubik """
+        return self.solveCubie(self.toCubie(stickers), maxLength, timeout)
+
+    def solveCubie(self, cube, maxLength = 22, timeout = 0.5):
+        """ Return the solution (list of moves) of a CubieCube (see solve) or None if no
+            solution was found, with timeout = 0 the first solution found is returned and with
+            timeout = None the first solution with at most maxLength moves (always the same) """
+        self.cube = cube
+        self.maxLength = maxLength
+        self.deadline = (time.monotonic() + timeout) if(timeout is not None) else float('inf')
+        self.best = None
+        self.path = []
+
+        twist, flip, slc = cube.getTwist(), cube.getFlip(), cube.getSlice()
+        depth = self.phase1Dist(twist, flip, slc)
+        while(depth <= 30):
+            if(self.phase1(twist, flip, slc, depth, -1)):
+                break
+            if((self.best is not None) and ((depth >= len(self.best)) or (time.monotonic() > self.deadline))):
+                break
+            depth += 1
+        return self.best
+
+    def phase1Dist(self, twist, flip, slc):
+        """ Return the lower bound of the count of phase 1 moves """
+        return max(self.views['pruneTwist'][twist * N_SLICE + slc], self.views['pruneFlip'][flip * N_SLICE + slc])
+
+    def phase1(self, twist, flip, slc, depth, lastFace):
+        """ Phase 1 search: find all the sequences of depth moves reaching G1 and
+            continue every one with phase 2, return True to stop the search """
+        # after the timeout the search stops as soon as a solution was found
+        if((self.best is not None) and (time.monotonic() > self.deadline)):
+            return True
+        if(depth == 0):
+            # A sequence ending with a phase 2 move was already checked with fewer moves
+            if((twist == 0) and (flip == 0) and (slc == 0)
+            and ((lastFace < 0) or (self.path[-1] not in phase2Moves))):
+                return self.startPhase2()
+            return False
+
+        twistMove, flipMove, sliceMove = self.views['twist'], self.views['flip'], self.views['slice']
+        pruneTwist, pruneFlip = self.views['pruneTwist'], self.views['pruneFlip']
+        for move in range(18):
+            face = move // 3
+            # never the same face twice, opposite faces in one order only
+            if((face == lastFace) or (face == lastFace - 3)):
+                continue
+            t = twistMove[twist * 18 + move]
+            f = flipMove[flip * 18 + move]
+            s = sliceMove[slc * 18 + move]
+            if((pruneTwist[t * N_SLICE + s] >= depth) or (pruneFlip[f * N_SLICE + s] >= depth)):
+                continue
+            self.path.append(move)
+            stop = self.phase1(t, f, s, depth - 1, face)
+            self.path.pop()
+            if(stop):
+                return True
+        return False
+
+    def startPhase2(self):
+        """ Search the phase 2 for the current phase 1 sequence, return True to stop the search """
+        if(time.monotonic() > self.deadline) and (self.best is not None):
+            return True
+        maxDepth = min(self.phase2Length, (30 if(self.best is None) else len(self.best) - 1) - len(self.path))
+        if(maxDepth < 0):
+            return False
+
+        cube = self.cube
+        for move in self.path:
+            cube = cube.multiply(self.moves[move])
+        corners, edges, slicePerm = cube.getCorners(), cube.getUdEdges(), cube.getSlicePerm()
+
+        lastFace = self.path[-1] // 3 if(self.path) else -1
+        depth = max(self.views['pruneCorners'][corners * N_PERM4 + slicePerm],
+                    self.views['pruneEdges'][edges * N_PERM4 + slicePerm])
+        phase1 = len(self.path)
+        while(depth <= maxDepth):
+            if(self.phase2(corners, edges, slicePerm, depth, lastFace)):
+                self.best = list(self.path)
+                del self.path[phase1:]
+                return len(self.best) <= self.maxLength
+            if((self.best is not None) and (time.monotonic() > self.deadline)):
+                return True
+            depth += 1
+        return False
+
+    def phase2(self, corners, edges, slicePerm, depth, lastFace):
+        """ Phase 2 search: return True if a sequence of depth moves solves the rubik
+            (the moves are added to self.path), the search is abandoned after the timeout """
+        if(depth == 0):
+            return (corners == 0) and (edges == 0) and (slicePerm == 0)
+
+        if((self.best is not None) and (time.monotonic() > self.deadline)):
+            return False
+        cornersMove, edgesMove, sliceMove = self.views['corners'], self.views['udEdges'], self.views['slicePerm']
+        pruneCorners, pruneEdges = self.views['pruneCorners'], self.views['pruneEdges']
+        for idx, move in enumerate(phase2Moves):
+            face = move // 3
+            if((face == lastFace) or (face == lastFace - 3)):
+                continue
+            c = cornersMove[corners * 10 + idx]
+            e = edgesMove[edges * 10 + idx]
+            s = sliceMove[slicePerm * 10 + idx]
+            if((pruneCorners[c * N_PERM4 + s] >= depth) or (pruneEdges[e * N_PERM4 + s] >= depth)):
+                continue
+            self.path.append(move)
+            if(self.phase2(c, e, s, depth - 1, face)):
+                return True
+            self.path.pop()
+        return False
+
+    def toCommands(self, moves):
+        """ Return the list of flip commands (see cmdqueue.flipCmdList) of moves,
+            the faces without flip command (D, B) are reached with whole-cube rotations """
+        turns = []
+        for move in moves:
+            face, power = divmod(move, 3)
+            turn = self.faceMoves[face]
+            turns += [turn, turn] if(power == 1) else [turn ^ 1 if(power == 2) else turn]
+        return self.compiler.toCommands(turns)
+
+    def solveCommands(self, stickers, maxLength = 22, timeout = 0.5):
+        """ Return the solution of stickers as a list of flip commands (see solve, toCommands)
+            or None if no solution was found """
+        moves = self.solve(stickers, maxLength, timeout)
+        if(moves is None):
+            return None
+        return self.toCommands(moves)
+
+    def solveData(self, rubikData, maxLength = 22, timeout = 0.5):
+        """ Return the solution of a RubikData instance as a list of flip commands (or None) """
+        return self.solveCommands(self.model.getState(rubikData), maxLength, timeout)
+
+#------------------------------------------------------------------------------
+# Solver already loaded
+_solver = None
+
+def getSolver():
+    """ Return the solver (the tables are loaded only once) """
+    global _solver
+    if(_solver is None):
+        _solver = Solver()
+    return _solver
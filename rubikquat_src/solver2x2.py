@@ -0,0 +1,268 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import itertools
+import numpy as np
+from . import facelet
+from . import rutils
+from . import tablegen
+from .solver import CubieCube, cornerNames, faceNormal, faceCubelet, permRank, permRankMany
+from .cmdqueue import flipCmdList, flipCmdDefMap
+
+#------------------------------------------------------------------------------
+# Optimal Solver for 2x2x2
+# The corner DBL is kept in place (a 2x2x2 has no centers: every state can be
+# rotated as a whole to bring the corner at DBL in its solved orientation),
+# the other 7 corners are moved only with U, R, F (9 moves: face * 3 + power):
+#
+#       state = perm * 729 + twist
+#       perm - rank of permutation of 7 corners (5040)
+#       twist - orientation of 6 corners (729), the 7th is given by the others
+#
+# The distance table holds the depth (count of moves to solved) of all the
+# 3674160 states, modulo 3 in 2 bits (4 states per byte, 900 KB):
+#
+#       byte:   [ s3 | s2 | s1 | s0 ]   state s = 4 * byte + slot
+#
+# The neighbors of a state at depth d are at depth d - 1, d or d + 1: their
+# values modulo 3 are distinct, an optimal solution follows the neighbors
+# with (d - 1) modulo 3 down to the solved state.
+#
+# The table is generated once (see tablegen), saved in the cache directory
+# and loaded memory-mapped.
+#------------------------------------------------------------------------------
+
+# Version of tables: increment it when the format of the tables changes
+tablesVersion = 1
+
+faceNames = 'URF'
+
+# Layer (index in flip definition list of rubikdef.generate) of faces U, R, F
+faceLayer = [1, 3, 0]
+
+# Positions of the 7 moving corners (all except DBL) in cornerNames
+DBL = 6
+positions = [0, 1, 2, 3, 4, 5, 7]
+
+N_PERM7 = 5040
+N_TWIST6 = 729
+N_STATES = N_PERM7 * N_TWIST6
+
+def stateIndex(cube):
+    """ Return the state index of a cubie cube (corner DBL solved) """
+    perm = permRank([positions.index(cube.cp[p]) for p in positions])
+    twist = 0
+    for p in positions[:6]:
+        twist = twist * 3 + cube.co[p]
+    return perm * N_TWIST6 + twist
+
+def permMoveTable(moves):
+    """ Return the (perm, move) table of permutation of 7 corners after every move """
+    states = np.array(list(itertools.permutations(range(7))), dtype=np.int8)
+    table = np.empty((N_PERM7, len(moves)), dtype=np.int32)
+    for m, cube in enumerate(moves):
+        table[:, m] = permRankMany(states[:, [positions.index(cube.cp[p]) for p in positions]])
+    return table
+
+def twistMoveTable(moves):
+    """ Return the (twist, move) table of orientation of 7 corners after every move """
+    weights = 3 ** np.arange(5, -1, -1)
+    co = (np.arange(N_TWIST6)[:, None] // weights) % 3
+    co = np.hstack((co, (-co.sum(axis=1, keepdims=True)) % 3))
+    table = np.empty((N_TWIST6, len(moves)), dtype=np.int32)
+    for m, cube in enumerate(moves):
+        idx = [positions.index(cube.cp[p]) for p in positions]
+        table[:, m] = ((co[:, idx] + [cube.co[p] for p in positions]) % 3)[:, :6] @ weights
+    return table
+
+def packTable(table):
+    """ Return the distance table packed in 2 bits per state (depth modulo 3) """
+    values = np.full((len(table) + 3) // 4 * 4, 3, dtype=np.uint8)
+    values[:len(table)] = table % 3
+    values = values.reshape(-1, 4)
+    return values[:, 0] | (values[:, 1] << 2) | (values[:, 2] << 4) | (values[:, 3] << 6)
+
+#------------------------------------------------------------------------------
+# Solver 2x2x2
+#------------------------------------------------------------------------------
+class Solver2x2:
+    """ Solver 2x2x2 - optimal solutions (the fewest moves) and distance to solved """
+
+    tableNames = ['perm', 'twist', 'dist']
+    tableShapes = {'perm': (N_PERM7, 9), 'twist': (N_TWIST6, 9), 'dist': ((N_STATES + 3) // 4,)}
+
+    def __init__(self, model = None, workers = 1):
+        """ Initialize solver: load the tables (generate and save them if missing)
+            model - facelet model of a 2x2x2 rubik (default: facelet.getModel(2))
+            workers - count of processes generating the distance table (see tablegen) """
+        if(model is None):
+            model = facelet.getModel(2)
+        self.model = model
+        self.workers = workers
+        self.initStickers()
+
+        # The 9 moves as cubie cubes, extracted from the compiled moves of facelet model
+        self.faceMoves = [model.moveIndex(layer, 1) for layer in faceLayer]
+        self.moves = []
+        for move in self.faceMoves:
+            cube = CubieCube()
+            turn = self.toCubie(model.apply(model.solved, move))
+            for power in range(3):
+                cube = cube.multiply(turn)
+                self.moves.append(cube)
+
+        tables = self.loadTables()
+        self.tables = tables
+        self.permMove = memoryview(np.ascontiguousarray(tables['perm']).reshape(-1))
+        self.twistMove = memoryview(np.ascontiguousarray(tables['twist']).reshape(-1))
+        self.dist = memoryview(tables['dist'])
+
+        # The flip command of every move (layer, +1 or -1)
+        self.cmds = {model.moveIndex(flipCmdDefMap[c][0], flipCmdDefMap[c][1]): c for c in flipCmdList}
+
+    def initStickers(self):
+        """ Initialize the indexes of stickers of every corner and the opposite of every color """
+        model = self.model
+        pos = {tuple(int(np.sign(v)) for v in cDef[0]): idx for idx, cDef in enumerate(model.rubikDef)}
+        slotSticker = {slot: sticker for sticker, slot in enumerate(model.slots)}
+
+        def stickers(names):
+            p = tuple(map(sum, zip(*(faceNormal[f] for f in names))))
+            return [slotSticker[pos[p] * 6 + faceCubelet[f]] for f in names]
+
+        self.cornerStickers = [stickers(names) for names in cornerNames]
+        # Colors of opposite faces [F,T,L,R,K,B] in the solved state
+        faceColor = {int(slot % 6): int(color) for slot, color in zip(model.slots, model.solved)}
+        opposite = [4, 5, 3, 2, 0, 1]
+        self.oppositeColor = {faceColor[f]: faceColor[opposite[f]] for f in range(6)}
+
+    def toCubie(self, stickers):
+        """ Return the CubieCube of stickers (see facelet.FaceletModel), the colors of
+            faces D, B, L are the colors of corner at DBL (any orientation of rubik)
+            raise ValueError if the stickers are not a valid rubik """
+        try:
+            colorFace = {int(stickers[s]): f for f, s in zip(cornerNames[DBL], self.cornerStickers[DBL])}
+            for color, f in list(colorFace.items()):
+                colorFace[self.oppositeColor[color]] = 'UFR'['DBL'.index(f)]
+            cube = CubieCube()
+            for i, idx in enumerate(self.cornerStickers):
+                names = ''.join(colorFace[int(stickers[s])] for s in idx)
+                ori = min(names.find('U') % 4, names.find('D') % 4)
+                cube.cp[i] = cornerNames.index(names[ori:] + names[:ori])
+                cube.co[i] = ori
+        except (KeyError, ValueError):
+            raise ValueError("Invalid rubik: unknown corner colors")
+        if(sorted(cube.cp) != list(range(8))):
+            raise ValueError("Invalid corners: some corners are missing")
+        if(sum(cube.co) % 3 != 0):
+            raise ValueError("Invalid corners: a corner is twisted")
+        return cube
+
+    def loadTable(self, fileName, name):
+        """ Return a table loaded memory-mapped or None if the file is missing or invalid
+            (the distance table: the solved state, index 0, must have the depth 0) """
+        try:
+            table = np.load(fileName, mmap_mode='r')
+            if((table.shape == self.tableShapes[name]) and ((name != 'dist') or ((table[0] & 3) == 0))):
+                return table
+        except (OSError, ValueError, EOFError):
+            pass
+        return None
+
+    def loadTables(self):
+        """ Return the tables loaded memory-mapped from cache directory,
+            if some of them are missing or invalid generate and save all of them """
+        path = rutils.getCacheDir()
+        fileName = lambda name: os.path.join(path, f'solver2x2_v{tablesVersion}_{name}.npy')
+        tables = {name: self.loadTable(fileName(name), name) for name in self.tableNames}
+        if(all(table is not None for table in tables.values())):
+            return tables
+
+        tables = {'perm': permMoveTable(self.moves), 'twist': twistMoveTable(self.moves)}
+        try:
+            for name, table in tables.items():
+                rutils.writeFile(fileName(name), lambda f: np.save(f, table))
+            # The full depth table (1 byte per state) is needed only while generating
+            depthName = fileName('depth')
+            depth = tablegen.buildPruneTable(depthName, fileName('perm'), fileName('twist'), workers=self.workers)
+            rutils.writeFile(fileName('dist'), lambda f: np.save(f, packTable(depth)))
+            del depth
+            os.remove(depthName)
+            tables = {name: self.loadTable(fileName(name), name) for name in self.tableNames}
+            if(any(table is None for table in tables.values())):
+                raise ValueError("Invalid solver tables")
+            return tables
+        except (OSError, ValueError):
+            tables['dist'] = packTable(tablegen.pruneTable(tables['perm'], tables['twist']))
+            return tables
+
+    def value(self, state):
+        """ Return the depth modulo 3 of a state """
+        return (self.dist[state >> 2] >> ((state & 3) << 1)) & 3
+
+    def path(self, state):
+        """ Return the optimal list of moves from a state to the solved state """
+        moves = []
+        permMove, twistMove = self.permMove, self.twistMove
+        while(state != 0):
+            perm, twist = divmod(state, N_TWIST6)
+            prev = (self.value(state) + 2) % 3
+            for move in range(9):
+                nxt = permMove[perm * 9 + move] * N_TWIST6 + twistMove[twist * 9 + move]
+                if(self.value(nxt) == prev):
+                    break
+            else:
+                raise ValueError("Invalid distance table")
+            moves.append(move)
+            state = nxt
+        return moves
+
+    def solve(self, stickers):
+        """ Return an optimal solution (list of moves) of a 2x2x2 rubik
+            raise ValueError if the stickers are not a valid rubik (or the distance table is invalid) """
+        return self.path(stateIndex(self.toCubie(stickers)))
+
+    def distance(self, stickers):
+        """ Return the count of moves of an optimal solution of a 2x2x2 rubik """
+        return len(self.solve(stickers))
+
+    def toCommands(self, moves):
+        """ Return the list of flip commands (see cmdqueue.flipCmdList) of moves """
+        cmds = []
+        for move in moves:
+            face, power = divmod(move, 3)
+            turn = self.faceMoves[face]
+            cmds += [self.cmds[turn]] * 2 if(power == 1) else [self.cmds[turn ^ 1 if(power == 2) else turn]]
+        return cmds
+
+    def solveCommands(self, stickers):
+        """ Return an optimal solution of stickers as a list of flip commands """
+        return self.toCommands(self.solve(stickers))
+
+    def solveData(self, rubikData):
+        """ Return an optimal solution of a RubikData instance as a list of flip commands """
+        return self.solveCommands(self.model.getState(rubikData))
+
+#------------------------------------------------------------------------------
+# Solver already loaded
+_solver = None
+
+def getSolver2x2():
+    """ Return the 2x2x2 solver (the tables are loaded only once) """
+    global _solver
+    if(_solver is None):
+        _solver = Solver2x2()
+    return _solver
@@ -0,0 +1,91 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import hashlib
+import numpy as np
+from . import facelet
+
+#------------------------------------------------------------------------------
+# State Codec
+# Bit-packed encoding of rubik states: every sticker (see facelet.FaceletModel)
+# is a color 1..6 stored in 3 bits, the bits of all stickers are packed
+# into bytes (54 stickers of 3x3x3 --> 162 bits --> 21 bytes):
+#
+#       stickers:   [   2,     3,     5,     2, ... ]
+#       bits:       [ 0 1 0 | 0 1 1 | 1 0 1 | 0 1 0 ... ]
+#       packed:     [ 0x4e, 0xa8, ... ] (bytes)
+#
+# The packed state (bytes) is hashable: it can be used as dict/set key.
+# Python's hash of bytes changes from a process to another, stableHash
+# returns the same value everywhere (ex: to be stored in files).
+#------------------------------------------------------------------------------
+class StateCodec:
+    """ State Codec - encode/decode rubik states in packed bytes """
+
+    # Bits of a sticker
+    bits = 3
+
+    def __init__(self, model = None):
+        """ Initialize codec
+            model - facelet model of rubik (default: 3x3x3) """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.stickers = len(model.slots)
+        self.nbytes = (self.stickers * self.bits + 7) // 8
+        # Weights of bits of a sticker (most significant first)
+        self.weights = (1 << np.arange(self.bits - 1, -1, -1)).astype(np.uint8)
+
+    def packMany(self, states):
+        """ Pack many states: (M, stickers) array --> (M, nbytes) uint8 array """
+        states = np.asarray(states, dtype=np.uint8).reshape(-1, self.stickers)
+        bits = np.unpackbits(states[:, :, None], axis=2)[:, :, 8 - self.bits:]
+        return np.packbits(bits.reshape(len(states), -1), axis=1)
+
+    def unpackMany(self, packed):
+        """ Unpack many states: (M, nbytes) uint8 array --> (M, stickers) array """
+        packed = np.asarray(packed, dtype=np.uint8).reshape(-1, self.nbytes)
+        bits = np.unpackbits(packed, axis=1)[:, :self.stickers * self.bits]
+        return (bits.reshape(len(packed), self.stickers, self.bits) @ self.weights).astype(np.uint8)
+
+    def pack(self, stickers):
+        """ Pack the stickers of a state into bytes """
+        return self.packMany(stickers)[0].tobytes()
+
+    def unpack(self, packed):
+        """ Unpack bytes into the stickers of a state """
+        return self.unpackMany(np.frombuffer(packed, dtype=np.uint8))[0]
+
+    def encode(self, rubikData):
+        """ Encode the state of a RubikData instance into bytes """
+        return self.pack(self.model.getState(rubikData))
+
+    def decode(self, packed, rubikData):
+        """ Decode bytes into the state of a RubikData instance """
+        self.model.setState(rubikData, self.unpack(packed))
+
+    @staticmethod
+    def stableHash(packed):
+        """ Return a stable 64-bit hash (int) of a packed state """
+        return int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def toInt(packed):
+        """ Return the packed state as an int """
+        return int.from_bytes(packed, 'big')
+
+    def fromInt(self, value):
+        """ Return the packed state (bytes) of an int (see toInt) """
+        return value.to_bytes(self.nbytes, 'big')
@@ -0,0 +1,136 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import numpy as np
+from . import facelet
+
+#------------------------------------------------------------------------------
+# Symmetry
+# Equivalent states: a state rotated as a whole (24 rotations), optionally
+# mirrored (48 symmetries) and with the colors relabeled is solved with the
+# same count of moves. The canonical form of a state is the representative
+# of all equivalent states:
+#
+#   1. the stickers are moved by every symmetry (precomputed permutations):
+#           candidate[s] = stickers[perms[s]]
+#   2. the colors of every candidate are relabeled: by the faces of the center
+#      stickers [F,T,L,R,K,B] --> 1..6 (odd sizes), otherwise in the order
+#      they appear (the first color becomes 1, the next new color 2, ...)
+#   3. the lexicographically smallest candidate is the canonical form
+#------------------------------------------------------------------------------
+class Symmetry:
+    """ Symmetry - canonical form of states under rotations (and mirroring) """
+
+    def __init__(self, model = None, mirror = False):
+        """ Initialize symmetry tables
+            model - facelet model of rubik (default: 3x3x3)
+            mirror - if True use also the mirrored symmetries (48 instead of 24) """
+        if(model is None):
+            model = facelet.getModel()
+        self.model = model
+        self.stickers = len(model.slots)
+        # The rotations are the frames of facelet model (reached with whole-cube rotations)
+        perms = model.frames
+        if(mirror):
+            perms = np.vstack((perms, self.mirrorPerm()[perms]))
+        self.perms = perms
+        self.colors = np.arange(1, 7, dtype=np.uint8)
+        # stickers in the center of faces (None for even sizes)
+        self.centers = self.faceCenters()
+
+    def mirrorPerm(self):
+        """ Return the permutation of stickers mirroring rubik on axis X (left <--> right) """
+        pos = [tuple(cDef[0]) for cDef in self.model.rubikDef]
+        posIdx = {p: idx for idx, p in enumerate(pos)}
+        slotSticker = {slot: sticker for sticker, slot in enumerate(self.model.slots)}
+        mirrorFace = [0, 1, 3, 2, 4, 5]     # [F,T,L,R,K,B]: L <--> R
+        perm = np.empty(self.stickers, dtype=np.intp)
+        for sticker, slot in enumerate(self.model.slots):
+            x, y, z = pos[slot // 6]
+            cubel = posIdx[(-x, y, z)]
+            perm[sticker] = slotSticker[cubel * 6 + mirrorFace[slot % 6]]
+        return perm
+
+    def faceCenters(self):
+        """ Return the indexes of center stickers of faces [F,T,L,R,K,B] 
+            or None if rubik has no center stickers (even sizes) """
+        faceAxis = [2, 1, 0, 0, 2, 1]           # axis of normal of faces [F,T,L,R,K,B]
+        centers = [None] * 6
+        for sticker, slot in enumerate(self.model.slots):
+            pos = self.model.rubikDef[slot // 6][0]
+            face = slot % 6
+            if(all(pos[a] == 0 for a in range(3) if(a != faceAxis[face]))):
+                centers[face] = sticker
+        if(None in centers):
+            return None
+        return np.array(centers, dtype=np.intp)
+
+    def relabelCenters(self, states):
+        """ Relabel the colors of states (K, stickers) by the faces of their center stickers """
+        rows = np.arange(len(states))[:, None]
+        cmap = np.zeros((len(states), 8), dtype=np.uint8)
+        cmap[rows, states[:, self.centers]] = self.colors
+        return cmap[rows, states]
+
+    def relabel(self, states):
+        """ Relabel the colors of states (..., stickers) in the order they appear """
+        shape = states.shape
+        states = states.reshape(-1, self.stickers)
+        rows = np.arange(len(states))[:, None]
+        # position of the first appearance of every color (colors not present: at the end)
+        found = (states[:, :, None] == self.colors)
+        first = found.argmax(axis=1)
+        first[~found[rows, first, np.arange(6)]] = self.stickers
+        # new label of every color: its rank in order of appearance
+        cmap = np.zeros((len(states), 8), dtype=np.uint8)
+        cmap[rows, np.argsort(first, axis=1, kind='stable') + 1] = self.colors
+        result = cmap[rows, states]
+        # relabel by centers the states whose center stickers have all different colors
+        if(self.centers is not None):
+            centers = np.sort(states[:, self.centers], axis=1)
+            distinct = (centers[:, 1:] != centers[:, :-1]).all(axis=1)
+            if(distinct.any()):
+                result[distinct] = self.relabelCenters(states[distinct])
+        return result.reshape(shape)
+
+    def canonical(self, stickers):
+        """ Return the canonical form of a state (stickers) """
+        cand = np.ascontiguousarray(self.relabel(stickers[self.perms]))
+        return cand[np.argmin(cand.view('S%d' % self.stickers).ravel())]
+
+    def canonicalMany(self, states):
+        """ Return the canonical forms of many states: (M, stickers) --> (M, stickers) """
+        cand = self.relabel(states[:, self.perms])
+        # lexicographic minimum: keep the candidates equal to the minimum column by column
+        alive = np.ones(cand.shape[:2], dtype=bool)
+        for col in range(self.stickers):
+            vals = np.where(alive, cand[:, :, col], 255)
+            alive &= (vals == vals.min(axis=1)[:, None])
+        return cand[np.arange(len(cand)), alive.argmax(axis=1)]
+
+    def canonicalData(self, rubikData):
+        """ Return the canonical form of the state of a RubikData instance """
+        return self.canonical(self.model.getState(rubikData))
+
+#------------------------------------------------------------------------------
+# Symmetry tables already built: (size, mirror) --> Symmetry
+_symmetries = {}
+
+def getSymmetry(n = 3, mirror = False):
+    """ Return the symmetry tables of a NxNxN rubik (see facelet.getModel) """
+    key = (n, mirror)
+    if(key not in _symmetries):
+        _symmetries[key] = Symmetry(facelet.getModel(n), mirror)
+    return _symmetries[key]
@@ -0,0 +1,164 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import sys
+import json
+import multiprocessing
+import numpy as np
+
+#------------------------------------------------------------------------------
+# Pruning Tables Generator
+# A pruning table of two coordinates (a, b) holds for every index a * nB + b
+# the count of moves to reach the goal, it is built by a breadth-first search
+# over the move tables of coordinates (coordinate x move --> coordinate):
+#
+#       depth 0:    table[goal] = 0, all other entries UNKNOWN
+#       depth d:    every entry == d is expanded with all moves,
+#                   the reached entries still UNKNOWN become d + 1
+#
+# Parallel generation: the table is a .npy file memory-mapped by all processes
+# of a pool, every depth is split in chunks of table (index ranges), a worker
+# expands the entries == d of its chunk and writes d + 1 directly in the shared
+# table (the same value written by more workers is harmless).
+#
+# Checkpoint: while generating, the table is kept in fileName + '.part' and
+# after every depth the next depth to expand is saved in fileName + '.ckpt'.
+# An interrupted generation continues from the last checkpoint (the entries
+# written after it are already correct). When done the table is renamed to
+# fileName and the checkpoint is removed.
+#------------------------------------------------------------------------------
+UNKNOWN = 255
+
+# Count of states expanded at once by a worker (bounds the memory of workers)
+BLOCK = 1 << 16
+
+# Tasks per worker at every depth (the depths have very different frontiers,
+# more tasks than workers keep the pool busy) and the minimal size of a task
+TASKS = 8
+MIN_CHUNK = 1 << 12
+
+def expand(table, moveA, moveB, frontier, depth):
+    """ Expand the states of frontier (indexes of table == depth): write depth + 1
+        in the UNKNOWN entries reached with one move, return the count of new entries """
+    nB = len(moveB)
+    count = 0
+    for i in range(0, len(frontier), BLOCK):
+        a, b = np.divmod(frontier[i : i + BLOCK], nB)
+        nxt = (moveA[a] * nB + moveB[b]).reshape(-1)
+        nxt = np.unique(nxt[table[nxt] == UNKNOWN])
+        table[nxt] = depth + 1
+        count += len(nxt)
+    return count
+
+def pruneTable(moveA, moveB, goal = 0):
+    """ Return the pruning table of coordinates (a, b) generated in memory
+        moveA, moveB - the move tables of coordinates (the same moves)
+        goal - the index of goal (a * nB + b) """
+    table = np.full(len(moveA) * len(moveB), UNKNOWN, dtype=np.uint8)
+    table[goal] = 0
+    depth = 0
+    while(expand(table, moveA, moveB, np.flatnonzero(table == depth), depth) > 0):
+        depth += 1
+    return table
+
+#------------------------------------------------------------------------------
+# Worker process: the tables memory-mapped once (see initWorker)
+_worker = {}
+
+def initWorker(partName, moveAName, moveBName):
+    """ Initialize a worker: map the table and the move tables """
+    _worker['table'] = np.load(partName, mmap_mode='r+')
+    _worker['moveA'] = np.load(moveAName, mmap_mode='r')
+    _worker['moveB'] = np.load(moveBName, mmap_mode='r')
+
+def expandChunk(start, stop, depth):
+    """ Expand the entries == depth of table[start:stop], return the count of new entries """
+    table = _worker['table']
+    frontier = np.flatnonzero(table[start:stop] == depth) + start
+    count = expand(table, _worker['moveA'], _worker['moveB'], frontier, depth)
+    table.flush()
+    return count
+
+def loadCheckpoint(ckptName, size):
+    """ Return the depth saved in checkpoint or None (missing or other table) """
+    try:
+        with open(ckptName) as f:
+            ckpt = json.load(f)
+        if(ckpt['size'] == size):
+            return ckpt['depth']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def saveCheckpoint(ckptName, size, depth):
+    """ Save the checkpoint: depth is the next depth to expand """
+    with open(ckptName + '.tmp', 'w') as f:
+        json.dump({'size': size, 'depth': depth}, f)
+    os.replace(ckptName + '.tmp', ckptName)
+
+def buildPruneTable(fileName, moveAName, moveBName, goal = 0, workers = None, chunk = None):
+    """ Generate a pruning table with a pool of processes, save it in fileName (.npy)
+        and return it memory-mapped (read only)
+        moveAName, moveBName - the files (.npy) of move tables of coordinates
+        goal - the index of goal (a * nB + b)
+        workers - count of processes (default: count of CPUs), 1 = no pool
+        chunk - count of table entries expanded by a task (default: the table split
+                in TASKS tasks per worker, at least MIN_CHUNK entries) """
+    moveA = np.load(moveAName, mmap_mode='r')
+    moveB = np.load(moveBName, mmap_mode='r')
+    size = len(moveA) * len(moveB)
+    partName = fileName + '.part'
+    ckptName = fileName + '.ckpt'
+    del moveA, moveB
+
+    # Continue from checkpoint or start a new table
+    depth = loadCheckpoint(ckptName, size)
+    if((depth is None) or (not os.path.exists(partName))):
+        table = np.lib.format.open_memmap(partName, mode='w+', dtype=np.uint8, shape=(size,))
+        table[:] = UNKNOWN
+        table[goal] = 0
+        table.flush()
+        del table
+        depth = 0
+        saveCheckpoint(ckptName, size, depth)
+
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    if(chunk is None):
+        chunk = max(MIN_CHUNK, -(-size // (workers * TASKS)))
+    tasks = lambda depth: [(start, min(start + chunk, size), depth) for start in range(0, size, chunk)]
+
+    if(workers <= 1):
+        initWorker(partName, moveAName, moveBName)
+        while(sum(expandChunk(*task) for task in tasks(depth)) > 0):
+            depth += 1
+            saveCheckpoint(ckptName, size, depth)
+        _worker.clear()
+    else:
+        with multiprocessing.Pool(workers, initWorker, (partName, moveAName, moveBName)) as pool:
+            while(sum(pool.starmap(expandChunk, tasks(depth))) > 0):
+                depth += 1
+                saveCheckpoint(ckptName, size, depth)
+
+    os.replace(partName, fileName)
+    os.remove(ckptName)
+    return np.load(fileName, mmap_mode='r')
+
+#------------------------------------------------------------------------------
+# Generate the tables of solver: python -m rubikquat_src.tablegen [workers]
+if __name__ == '__main__':
+    from . import solver
+    solver.Solver(workers = int(sys.argv[1]) if(len(sys.argv) > 1) else None)
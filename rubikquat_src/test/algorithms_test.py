@@ -0,0 +1,107 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import numpy as np
+import pytest
+from rubikquat_src import rubik
+from rubikquat_src import batch
+from rubikquat_src import algorithms
+from rubikquat_src.cmdqueue import flipCmdDefMap
+
+# ###############################################################################
+# Tests: algorithm library against the moves applied one by one
+# ###############################################################################
+def cmdMoves(model, cmds):
+    """ Return the moves of facelet model of flip commands """
+    return [model.moveIndex(*flipCmdDefMap[cmd][:2]) for cmd in cmds]
+
+def randomBatch(model, count, framed, seed):
+    """ Return a batch of random rubiks (random moves, also whole-cube rotations) """
+    rng = np.random.default_rng(seed)
+    rubikBatch = batch.RubikBatch(count, model, framed)
+    rubikBatch.applySeq(rng.integers(0, len(model.moves), (count, 20)).astype(np.uint8))
+    return rubikBatch
+
+def test_apply():
+    """ apply and applyData give the state of the commands applied one by one """
+    lib = algorithms.AlgorithmLibrary()
+    model = lib.model
+    stickers = randomBatch(model, 1, False, 1).states[0]
+    for name in lib.names():
+        moves = cmdMoves(model, lib.getCmds(name))
+        expected = model.applySeq(stickers, moves)
+        assert (lib.apply(name, stickers) == expected).all()
+        data = rubik.RubikData(model.rubikDef)
+        model.setState(data, stickers)
+        lib.applyData(name, data)
+        assert (model.getState(data) == expected).all()
+
+def test_apply_batch():
+    """ applyBatch gives the states of the commands applied one by one, plain and framed batches """
+    lib = algorithms.AlgorithmLibrary()
+    model = lib.model
+    for name in lib.names():
+        moves = cmdMoves(model, lib.getCmds(name))
+        rubikBatch = randomBatch(model, 16, False, 2)
+        states = rubikBatch.states.copy()
+        lib.applyBatch(name, rubikBatch)
+        for idx in range(rubikBatch.count):
+            assert (rubikBatch.states[idx] == model.applySeq(states[idx], moves)).all()
+        # framed: every rubik in its own frame
+        rubikBatch = randomBatch(model, 16, True, 3)
+        assert len(set(rubikBatch.frame.tolist())) > 1
+        states, frames = rubikBatch.states.copy(), rubikBatch.frame.copy()
+        lib.applyBatch(name, rubikBatch)
+        for idx in range(rubikBatch.count):
+            expected = model.getPhysical(*model.applySeqFramed(states[idx], frames[idx], moves))
+            assert (model.getPhysical(rubikBatch.states[idx], rubikBatch.frame[idx]) == expected).all()
+
+def test_flip_all():
+    """ flipAll (x2 y2) is the rotation z2 """
+    lib = algorithms.AlgorithmLibrary()
+    lib.register('z2', 'zz')
+    assert (lib.getPerm('flipAll') == lib.getPerm('z2')).all()
+
+def test_cache():
+    """ The least recently used permutation is dropped, hits and misses are counted """
+    lib = algorithms.AlgorithmLibrary(cacheSize = 2)
+    perm = lib.getPerm('sexy')
+    lib.getPerm('sune')
+    assert (lib.hits, lib.misses) == (0, 2)
+    assert lib.getPerm('sexy') is perm
+    assert (lib.hits, lib.misses) == (1, 2)
+    # 'sune' is the least recently used
+    lib.getPerm('tperm')
+    assert list(lib.cache) == ['sexy', 'tperm']
+    lib.getPerm('sune')
+    assert list(lib.cache) == ['tperm', 'sune']
+    assert (lib.hits, lib.misses) == (1, 4)
+
+def test_register():
+    """ register and remove invalidate the cached permutation """
+    lib = algorithms.AlgorithmLibrary()
+    model = lib.model
+    lib.register('alg', 'ru')
+    assert (lib.getPerm('alg') == model.applySeq(np.arange(len(model.slots)), cmdMoves(model, 'ru'))).all()
+    lib.register('alg', 'fF')
+    assert 'alg' not in lib.cache
+    assert (lib.getPerm('alg') == np.arange(len(model.slots))).all()
+    lib.remove('alg')
+    assert 'alg' not in lib.cache
+    assert 'alg' not in lib.names()
+    with pytest.raises(KeyError):
+        lib.getPerm('alg')
+    with pytest.raises(ValueError):
+        lib.register('bad', 'ru?')
@@ -0,0 +1,59 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from rubikquat_src import analysis
+from rubikquat_src import seqcomp
+
+# ###############################################################################
+# Tests: order and cycles of sequences
+# ###############################################################################
+def test_order():
+    """ Known orders of sequences (lowercase = clockwise) """
+    analyzer = analysis.getAnalyzer(3)
+    assert analyzer.order('') == 1
+    assert analyzer.order('r') == 4
+    assert analyzer.order('rr') == 2
+    assert analyzer.order('ru') == 105         # R U
+    assert analyzer.order('ruRU') == 6         # R U R' U'
+    assert analyzer.order('x') == 4
+
+def test_order_1260():
+    """ R U2 D' B D' has the largest order of the 3x3x3: 1260 """
+    compiler = seqcomp.getCompiler(3)
+    face = {'U': (1, 1), 'R': (3, -1), 'D': (8, -1), 'B': (7, -1)}
+    moves = []
+    for f, turns in (('R', 1), ('U', 2), ('D', -1), ('B', 1), ('D', -1)):
+        layer, direction = face[f]
+        moves += [compiler.model.moveIndex(layer, direction * (1 if(turns > 0) else -1))] * abs(turns)
+    # the layers D and B are reached with whole-cube rotations, back to the initial orientation at the end
+    cmds = compiler.toCommands(moves, 0, 0)
+    assert analysis.getAnalyzer(3).order(cmds) == 1260
+
+def test_order_replay():
+    """ The sequence repeated order times is back to the solved state, not before """
+    analyzer = analysis.getAnalyzer(3)
+    model = analyzer.model
+    for cmds in ('ruRU', 'rfRF', 'ruuRUrUR', 'fU'):
+        order = analyzer.order(cmds)
+        moves = [seqcomp.getCompiler(3).cmdMove[cmd] for cmd in cmds]
+        stickers = model.solved
+        for i in range(order):
+            stickers = model.applySeq(stickers, moves)
+            assert ((stickers == model.solved).all()) == (i == order - 1)
+
+def test_cycles():
+    """ The cycles of R U: a twisted 5-cycle and a twisted corner of corners, a 7-cycle of edges """
+    order, cycles, affected = analysis.getAnalyzer(3).analyze('ru')
+    assert sorted((len(c.cubelets), c.twist) for c in cycles) == [(1, 3), (5, 3), (7, 1)]
@@ -0,0 +1,79 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from rubikquat_src import cmdqueue
+from rubikquat_src.cmdqueue import flipCmdDefMap
+
+# ###############################################################################
+# Tests: command queue (pending commands, peek, undo/redo)
+# ###############################################################################
+def drain(queue):
+    """ Return all pending commands: peekNextCmd and pendingCount before every getNextCmd """
+    cmds = []
+    while(queue.pendingCount() > 0):
+        count, cmd = queue.pendingCount(), queue.peekNextCmd()
+        # peek doesn't consume the command
+        assert queue.peekNextCmd() == cmd
+        assert queue.pendingCount() == count
+        assert queue.getNextCmd() == cmd
+        assert queue.pendingCount() == count - 1
+        cmds.append(cmd)
+    assert queue.peekNextCmd() is None
+    assert queue.getNextCmd() is None
+    return cmds
+
+def test_pending():
+    """ The pending commands of the command list """
+    queue = cmdqueue.CmdQueue()
+    assert queue.pendingCount() == 0
+    assert queue.peekNextCmd() is None
+    for cmd in 'fur':
+        queue.flip(cmd)
+    assert queue.pendingCount() == 3
+    assert drain(queue) == [flipCmdDefMap[cmd] for cmd in 'fur']
+
+def test_undo_redo():
+    """ The undo commands are pending before the command list, redo adds the command again """
+    queue = cmdqueue.CmdQueue()
+    for cmd in 'fu':
+        queue.flip(cmd)
+    drain(queue)
+    queue.undo()
+    queue.undo()
+    assert queue.pendingCount() == 2
+    # the inverse commands, the last command first
+    assert drain(queue) == [(1, -1), (0, -1)]
+    queue.redo()
+    assert queue.pendingCount() == 1
+    assert drain(queue) == [flipCmdDefMap['f']]
+    # undo entries and commands pending together: undo list first
+    queue.undo()
+    queue.redo()
+    queue.flip('r')
+    assert queue.pendingCount() == 3
+    assert drain(queue) == [(0, -1), flipCmdDefMap['f'], flipCmdDefMap['r']]
+
+def test_flip_after_undo():
+    """ A command after undo drops the redo commands """
+    queue = cmdqueue.CmdQueue()
+    for cmd in 'fu':
+        queue.flip(cmd)
+    drain(queue)
+    queue.undo()
+    drain(queue)
+    queue.flip('l')
+    queue.redo()
+    assert queue.pendingCount() == 1
+    assert drain(queue) == [flipCmdDefMap['l']]
@@ -0,0 +1,59 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rubikquat_src import rubikdef
+from rubikquat_src import facelet
+from rubikquat_src import solver
+from rubikquat_src import solver2x2
+from rubikquat_src import notation
+from rubikquat_src import algorithms
+
+# ###############################################################################
+# pytest configuration: the tests (*_test.py with test_ functions) run with
+#       python -m pytest rubikquat_src/test
+# The interactive demos (pygame windows) are not collected
+# ###############################################################################
+collect_ignore = ['cubelet_test.py', 'rubik_test.py']
+
+# Memoized data of modules: (module, name of global) cleared for the tests
+memos = [(rubikdef, '_generated'), (facelet, '_models'), (solver, '_solver'),
+         (solver2x2, '_solver'), (notation, '_parsers'),
+         (algorithms, '_libraries')]
+
+def clearMemos():
+    """ Clear the memoized data of modules (dictionaries or single instances) """
+    for module, name in memos:
+        if(isinstance(getattr(module, name), dict)):
+            getattr(module, name).clear()
+        else:
+            setattr(module, name, None)
+
+@pytest.fixture(scope='session', autouse=True)
+def cacheDir(tmp_path_factory):
+    """ The generated data (rubik definitions, tables) is cached in a temporary directory,
+        never in the cache directory of user (see rutils.getCacheDir) """
+    saved = os.environ.get('RUBIKQUAT_CACHE')
+    os.environ['RUBIKQUAT_CACHE'] = str(tmp_path_factory.mktemp('cache'))
+    clearMemos()
+    yield os.environ['RUBIKQUAT_CACHE']
+    clearMemos()
+    if(saved is None):
+        del os.environ['RUBIKQUAT_CACHE']
+    else:
+        os.environ['RUBIKQUAT_CACHE'] = saved
@@ -0,0 +1,81 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import random
+import numpy as np
+from rubikquat_src import rubik
+from rubikquat_src import facelet
+from rubikquat_src import batch
+from rubikquat_src.cmdqueue import flipCmdList, flipCmdDefMap
+
+# ###############################################################################
+# Tests: facelet model and batch engine against the flips of RubikSet
+# ###############################################################################
+def flipSets(model, cmds):
+    """ Return the RubikData after the flip commands done with RubikSet.flip (as the engine) """
+    data = rubik.RubikData(model.rubikDef)
+    sets = [rubik.RubikSet(data, setDef) for setDef in model.flipDef]
+    for layer, direction in cmds:
+        # the engine flips the set in the opposite direction of command
+        sets[layer].flip(-direction)
+    return data
+
+def randomCmds(model, count, seed):
+    """ Return random flip commands (layer, direction) of all layers of model """
+    rnd = random.Random(seed)
+    return [(rnd.randrange(len(model.flipDef)), rnd.choice((1, -1))) for i in range(count)]
+
+def test_model_flips():
+    """ The compiled moves give the same state as RubikSet.flip """
+    for n in (2, 3, 4):
+        model = facelet.getModel(n)
+        for seed in range(5):
+            cmds = randomCmds(model, 30, seed)
+            stickers = model.applySeq(model.solved, [model.moveIndex(*cmd) for cmd in cmds])
+            assert (stickers == model.getState(flipSets(model, cmds))).all()
+
+def test_batch_flips():
+    """ Every rubik of a batch gives the same state as RubikSet.flip """
+    model = facelet.getModel(3)
+    cmds = [randomCmds(model, 25, seed) for seed in range(8)]
+    moves = np.array([[model.moveIndex(*cmd) for cmd in seq] for seq in cmds], dtype=np.uint8)
+    rubikBatch = batch.RubikBatch(len(cmds), model)
+    rubikBatch.applySeq(moves)
+    for idx, seq in enumerate(cmds):
+        assert (rubikBatch.states[idx] == model.getState(flipSets(model, seq))).all()
+    assert not rubikBatch.isSolved().any()
+    rubikBatch.reset()
+    assert rubikBatch.isSolved().all()
+
+def test_batch_framed():
+    """ The physical state of a framed batch is the state of RubikSet.flip """
+    model = facelet.getModel(3)
+    rnd = random.Random(1)
+    cmds = [flipCmdDefMap[rnd.choice(flipCmdList)][:2] for i in range(40)]
+    rubikBatch = batch.RubikBatch(1, model, framed=True)
+    rubikBatch.applySeq([model.moveIndex(*cmd) for cmd in cmds])
+    data = rubik.RubikData(model.rubikDef)
+    rubikBatch.getState(0, data)
+    assert (data.data == flipSets(model, cmds).data).all()
+    # the framed state of facelet model
+    stickers, frame = model.applySeqFramed(model.solved, 0, [model.moveIndex(*cmd) for cmd in cmds])
+    assert (model.getPhysical(stickers, frame) == model.getState(data)).all()
+
+def test_solved():
+    """ Solved state, also after whole-cube rotations """
+    model = facelet.getModel(3)
+    assert model.isSolved(model.solved)
+    assert model.isSolved(model.applySeq(model.solved, [model.moveIndex(4, 1), model.moveIndex(5, -1)]))
+    assert not model.isSolved(model.apply(model.solved, model.moveIndex(0, 1)))
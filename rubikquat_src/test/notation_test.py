@@ -0,0 +1,84 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import pytest
+import numpy as np
+from rubikquat_src import notation
+from rubikquat_src.cmdqueue import flipCmdDefMap
+
+# ###############################################################################
+# Tests: notation parser
+# ###############################################################################
+def perm(parser, cmds):
+    """ Return the permutation of stickers of flip commands """
+    model = parser.model
+    result = np.arange(len(model.slots))
+    for layer, direction in cmds:
+        result = result[model.moves[model.moveIndex(layer, direction)]]
+    return result
+
+def test_moves():
+    """ Standard moves are the flip commands (lowercase flip commands = clockwise) """
+    parser = notation.getParser(3)
+    assert parser.parse("R U' M2") == [(3, -1), (1, -1), (9, 1), (9, 1)]
+    expected = [flipCmdDefMap[cmd][:2] for cmd in 'ruRUfl']
+    assert parser.parse("R U R' U' F L") == expected
+    assert parser.parse("RUR'U'FL") == expected
+    assert parser.parse("") == []
+    assert parser.parse("  # comment") == []
+
+def test_equivalent():
+    """ Rotations, wide moves and slices as combinations of face moves """
+    for n in (2, 3, 4):
+        parser = notation.getParser(n)
+        same = lambda a, b: (perm(parser, parser.parse(a)) == perm(parser, parser.parse(b))).all()
+        assert same("x", f"{n}Rw") and same("y", f"{n}Uw") and same("z", f"{n}Fw")
+        assert same("x'", f"{n}Lw") and same("y", f"{n}Dw'")
+        assert same("R2", "R R") and same("R2'", "R' R'") and same("R R'", "")
+        assert same("Rw", "r") and same("Rw", "R 2R")
+    parser = notation.getParser(3)
+    same = lambda a, b: (perm(parser, parser.parse(a)) == perm(parser, parser.parse(b))).all()
+    assert same("x", "R M' L'") and same("y", "U E' D'") and same("z", "F S B'")
+
+def test_errors():
+    """ Invalid moves are reported with line and column """
+    parser = notation.getParser(3)
+    for text, column in (("R U Q", 5), ("R U 4R", 5), ("Rw w", 4), ("  F G2", 5)):
+        with pytest.raises(notation.NotationError) as error:
+            parser.parse(text, 7)
+        assert (error.value.line, error.value.column) == (7, column)
+        assert str(error.value).startswith(f"line 7, column {column}:")
+    with pytest.raises(notation.NotationError):
+        notation.getParser(2).parse("M")
+    # NotationError is a ValueError
+    with pytest.raises(ValueError):
+        parser.parse("R X")
+
+def test_file(tmp_path):
+    """ A file is read line by line, errors report the line in file """
+    fileName = tmp_path / 'sequences.txt'
+    fileName.write_text("R U R' U'\n\n# comment\nx Rw2 D\n")
+    parser = notation.getParser(3)
+    seqs = list(parser.parseFile(str(fileName)))
+    assert seqs == [parser.parse("R U R' U'"), parser.parse("x Rw2 D")]
+    batches = list(parser.batches(str(fileName), 1))
+    assert [b.shape for b in batches] == [(1, 4), (1, 6)]
+    assert (batches[0][0] == parser.parseMoves("R U R' U'")).all()
+    (tmp_path / 'empty.txt').write_text("")
+    assert list(parser.parseFile(str(tmp_path / 'empty.txt'))) == []
+    fileName.write_text("R U\n\n   F G2\n")
+    with pytest.raises(notation.NotationError) as error:
+        list(parser.parseFile(str(fileName)))
+    assert (error.value.line, error.value.column) == (3, 6)
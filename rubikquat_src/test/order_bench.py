@@ -0,0 +1,68 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rubikquat_src import analysis
+from rubikquat_src import seqcomp
+from rubikquat_src.cmdqueue import flipCmdDefMap
+
+# ###############################################################################
+# Benchmark: order of sequences, cycle decomposition vs. brute-force replay
+# (replay the sequence until the rubik comes back to the solved state)
+# Run: python rubikquat_src/test/order_bench.py
+# ###############################################################################
+def replayOrder(model, cmds):
+    """ Return the order of a sequence replaying it until the rubik is solved again """
+    moves = [model.moveIndex(flipCmdDefMap[cmd][0], flipCmdDefMap[cmd][1]) for cmd in cmds]
+    stickers = model.applySeq(model.solved, moves)
+    order = 1
+    while((stickers != model.solved).any()):
+        stickers = model.applySeq(stickers, moves)
+        order += 1
+    return order
+
+def timeit(func, repeat):
+    """ Return the result of func and the average time of a call in microseconds """
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) * 1e6 / repeat
+
+if __name__ == '__main__':
+    analyzer = analysis.getAnalyzer(3)
+    model = analyzer.model
+    # R U2 D' B D' (order 1260): the layers D and B are reached with whole-cube rotations
+    compiler = seqcomp.getCompiler(3)
+    # (layer, direction of a clockwise turn) of faces
+    face = {'U': (1, 1), 'R': (3, -1), 'F': (0, 1), 'D': (8, -1), 'L': (2, 1), 'B': (7, -1)}
+    move = lambda f, turn: model.moveIndex(face[f][0], face[f][1] * turn)
+    seq1260 = ''.join(compiler.toCommands([move('R', 1), move('U', 1), move('U', 1), move('D', -1), 
+                                           move('B', 1), move('D', -1)], 0, 0))
+
+    sequences = [('R U R\' U\'',        'ruRU'),
+                 ('T-perm',             'ruRURfrrURUruRF'),
+                 ('R U\'',              'rU'),
+                 ('R U',                'ru'),
+                 ('R U2 D\' B D\'',     seq1260)]
+
+    print(f"{'sequence':<16}{'commands':<24}{'order':>7}{'cycles us':>12}{'replay us':>12}{'speedup':>9}")
+    for name, cmds in sequences:
+        order, tCycles = timeit(lambda: analyzer.order(cmds), 1000)
+        replay, tReplay = timeit(lambda: replayOrder(model, cmds), 3)
+        assert order == replay, (name, order, replay)
+        print(f"{name:<16}{cmds:<24}{order:>7}{tCycles:>12.1f}{tReplay:>12.1f}{tReplay / tCycles:>9.0f}")
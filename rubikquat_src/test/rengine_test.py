@@ -0,0 +1,94 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import pytest
+
+# The engine runs headless (no window): a plain surface and no resource manager
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+from rubikquat_src.rengine import RubikEngine
+
+# ###############################################################################
+# Tests: flips animated together (RubikEngine.addFlip)
+# Layers of 3x3x3: 0 F, 1 T, 2 L, 3 R, 4 all Y, 5 all X, 6 all Z, 7 Back, 8 Bottom,
+# 9 M (X), 10 E (Y), 11 S (Z)
+# ###############################################################################
+def engine(size = 3):
+    """ Return a headless rubik engine """
+    return RubikEngine(None, (100, 100), pygame.Surface((1, 1)), (0, 0, 0), size)
+
+def animate(eng):
+    """ Process the requested flips until they finished (simulated time) """
+    t = 0.0
+    while(eng.isFlipping()):
+        t += 0.05
+        dirty = eng.process(t)
+        if(dirty):
+            eng.rotate(dirty)
+
+def test_merge():
+    """ The same layer in the same direction is merged into one flip of 180 degrees """
+    eng = engine()
+    assert not eng.addFlip(2, 1)
+    eng.reqFlip(2, 1)
+    assert eng.addFlip(2, 1)
+    assert eng.reqFlips == [[2, 1, 2]]
+    # already 180 degrees, or the other direction: requested after
+    assert not eng.addFlip(2, 1)
+    assert not eng.addFlip(2, -1)
+    assert eng.reqFlips == [[2, 1, 2]]
+    animate(eng)
+    expected = engine()
+    expected.applyFlip(2, 1)
+    expected.applyFlip(2, 1)
+    assert (eng.rubik.data == expected.rubik.data).all()
+
+def test_same_axis():
+    """ Disjoint layers on the same axis are added, overlapping layers are not """
+    eng = engine()
+    eng.reqFlip(2, 1)
+    assert eng.addFlip(3, -1)
+    assert eng.addFlip(9, 1)
+    # the whole rubik overlaps all layers
+    assert not eng.addFlip(5, 1)
+    assert [flip[0] for flip in eng.reqFlips] == [2, 3, 9]
+    animate(eng)
+    expected = engine()
+    for layer, direction in ((2, 1), (3, -1), (9, 1)):
+        expected.applyFlip(layer, direction)
+    assert (eng.rubik.data == expected.rubik.data).all()
+
+def test_cross_axis():
+    """ Flips on other axes are not added """
+    eng = engine()
+    eng.reqFlip(0, 1)
+    assert not eng.addFlip(1, 1)
+    assert not eng.addFlip(2, -1)
+    assert not eng.addFlip(4, 1)
+    assert eng.addFlip(11, -1)
+    assert eng.addFlip(7, 1)
+    assert [flip[0] for flip in eng.reqFlips] == [0, 11, 7]
+
+def test_overlap_4x4():
+    """ Inner slices of 4x4x4: disjoint slices are added, a slice is not added twice """
+    eng = engine(4)
+    axes = [flipDef[3] for flipDef in eng.rubFlipDef]
+    inner = [layer for layer in range(9, len(axes)) if(axes[layer] == 'X')]
+    eng.reqFlip(2, 1)
+    assert eng.addFlip(inner[0], 1)
+    assert eng.addFlip(inner[1], -1)
+    assert not eng.addFlip(inner[1], 1)
+    assert eng.addFlip(3, 1)
@@ -0,0 +1,51 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from rubikquat_src import rubik
+from rubikquat_src import rubikdef
+
+# ###############################################################################
+# Tests: generated rubik definitions
+# ###############################################################################
+def test_generate_3x3():
+    """ The generated 3x3x3 is the hand-written definition c3x3 """
+    cubelets, flipDef = rubikdef.generate(3)
+    assert cubelets == rubikdef.c3x3
+    assert len(flipDef) == 12
+    # the same layers (the order of cubelets in a layer can differ): the same flips
+    for layer, setDef in enumerate(rubikdef.c3x3_flipDef):
+        assert flipDef[layer][2:] == setDef[2:]
+        for direction in (1, -1):
+            assert (rubik.flipPerm(27, flipDef[layer], direction) == rubik.flipPerm(27, setDef, direction)).all()
+
+def test_generate_sizes():
+    """ Count of cubelets and layers of generated rubiks """
+    for n in (2, 4, 5):
+        cubelets, flipDef = rubikdef.generate(n)
+        assert len(cubelets) == n ** 3
+        assert len(flipDef) == 9 + 3 * (n - 2)
+
+def test_generate_cache(tmp_path, monkeypatch):
+    """ The definition is loaded from the cache file, a damaged file is generated again """
+    monkeypatch.setenv('RUBIKQUAT_CACHE', str(tmp_path))
+    monkeypatch.setattr(rubikdef, '_generated', {})
+    expected = rubikdef.generate(4)
+    fileName = tmp_path / f'rubikdef_v{rubikdef.genVersion}_4.pickle'
+    assert fileName.exists()
+    rubikdef._generated.clear()
+    assert rubikdef.generate(4) == expected
+    fileName.write_bytes(fileName.read_bytes()[:100])
+    rubikdef._generated.clear()
+    assert rubikdef.generate(4) == expected
@@ -0,0 +1,72 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+from rubikquat_src import facelet
+from rubikquat_src import solver
+from rubikquat_src import scrambler
+
+# ###############################################################################
+# Tests: scrambler
+# ###############################################################################
+def test_scramble_state():
+    """ The scramble applied to the solved rubik gives the random state """
+    model = facelet.getModel(3)
+    s = scrambler.Scrambler(42)
+    for index in range(5):
+        stickers = model.applySeq(model.solved, s.scrambleMoves(index))
+        assert s.solver.toCubie(stickers) == s.randomCube(index)
+
+def test_scramble_solution():
+    """ The solution of the random state applied after the scramble gives the solved rubik """
+    model = facelet.getModel(3)
+    s = scrambler.Scrambler(42)
+    for index in range(5):
+        stickers = model.applySeq(model.solved, s.scrambleMoves(index))
+        cmds = s.solver.toCommands(s.solver.solveCubie(s.randomCube(index), 30, 0))
+        stickers = model.applySeq(stickers, [s.cmdMove[cmd] for cmd in cmds])
+        assert (stickers == model.solved).all()
+
+def test_random_cube():
+    """ The random states are valid and reproducible """
+    a, b = scrambler.Scrambler(7), scrambler.Scrambler(7)
+    for index in range(20):
+        cube = a.randomCube(index)
+        cube.verify()
+        assert cube == b.randomCube(index)
+    assert a.randomCube(0) != scrambler.Scrambler(8).randomCube(0)
+
+def test_binary_file(tmp_path):
+    """ The scrambles written in a binary file are read back """
+    fileName = str(tmp_path / 'scrambles.bin')
+    scrambler.writeBinary(fileName, 3, 42)
+    s = scrambler.Scrambler(42)
+    for index, moves in enumerate(scrambler.readBinary(fileName)):
+        assert (moves == s.scrambleMoves(index)).all()
+
+def test_binary_long(tmp_path, monkeypatch):
+    """ Scrambles longer than 255 moves and empty scrambles are read back """
+    cmdMove = solver.getSolver().compiler.cmdMove
+    seqs = [['f', 'U'] * 200, [], ['r'] * 256, ['x', 'L']]
+    monkeypatch.setattr(scrambler, 'scrambles', lambda *args: enumerate(seqs))
+    fileName = str(tmp_path / 'long.bin')
+    scrambler.writeBinary(fileName, len(seqs), maxLength = 400)
+    result = list(scrambler.readBinary(fileName))
+    assert len(result) == len(seqs)
+    for moves, cmds in zip(result, seqs):
+        assert moves.tolist() == [cmdMove[cmd] for cmd in cmds]
+    # no scrambles
+    monkeypatch.undo()
+    scrambler.writeBinary(fileName, 0)
+    assert list(scrambler.readBinary(fileName)) == []
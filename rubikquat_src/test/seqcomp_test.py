@@ -0,0 +1,50 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import random
+from rubikquat_src import seqcomp
+from rubikquat_src.cmdqueue import flipCmdList
+
+# ###############################################################################
+# Tests: sequence compiler
+# ###############################################################################
+def applyCmds(compiler, cmds):
+    """ Return the framed state (stickers, frame) after the flip commands """
+    model = compiler.model
+    return model.applySeqFramed(model.solved, 0, [compiler.cmdMove[cmd] for cmd in cmds])
+
+def test_round_trip():
+    """ The compiled sequence gives the same state and orientation, never longer """
+    for n in (2, 3, 4):
+        compiler = seqcomp.getCompiler(n)
+        rnd = random.Random(n)
+        for i in range(200):
+            cmds = [rnd.choice(flipCmdList) for j in range(rnd.randint(0, 30))]
+            result = compiler.compile(cmds)
+            assert len(result) <= len(cmds)
+            stickers, frame = applyCmds(compiler, cmds)
+            resultStickers, resultFrame = applyCmds(compiler, result)
+            assert (stickers == resultStickers).all() and (frame == resultFrame)
+            # the canonical form is compiled to itself
+            assert compiler.compile(result) == result
+
+def test_examples():
+    """ Cancelled and merged turns, canonical order """
+    compiler = seqcomp.getCompiler(3)
+    assert compiler.compile("x u U f f f X l r".split()) == ['U', 'l', 'r']
+    assert compiler.compile("ffff") == []
+    assert compiler.compile("uU") == []
+    assert compiler.compile("rrr") == ['R']
+    assert compiler.compile("rl") == compiler.compile("lr")
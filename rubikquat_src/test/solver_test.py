@@ -0,0 +1,93 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import os
+import copy
+import random
+import numpy as np
+import pytest
+from rubikquat_src import facelet
+from rubikquat_src import rutils
+from rubikquat_src import solver
+from rubikquat_src import solver2x2
+from rubikquat_src.cmdqueue import flipCmdList, flipCmdDefMap
+
+# ###############################################################################
+# Tests: solvers (the tables are generated at the first run, see rutils.getCacheDir)
+# ###############################################################################
+def scramble(model, seed, count):
+    """ Return the stickers after count random flip commands """
+    rnd = random.Random(seed)
+    cmds = [rnd.choice(flipCmdList) for i in range(count)]
+    return model.applySeq(model.solved, [model.moveIndex(*flipCmdDefMap[cmd][:2]) for cmd in cmds])
+
+def applyCmds(model, stickers, cmds):
+    return model.applySeq(stickers, [model.moveIndex(*flipCmdDefMap[cmd][:2]) for cmd in cmds])
+
+def test_solver():
+    """ The solutions of the 3x3x3 solver solve the rubik """
+    s = solver.getSolver()
+    model = s.model
+    for seed in range(10):
+        stickers = scramble(model, seed, 40)
+        cmds = s.solveCommands(stickers)
+        assert model.isSolved(applyCmds(model, stickers, cmds))
+        assert len(s.solve(stickers)) <= 30
+    assert s.solveCommands(model.solved) == []
+
+def test_solver_invalid():
+    """ An invalid rubik (a twisted corner) raises ValueError """
+    s = solver.getSolver()
+    stickers = s.model.solved.copy()
+    idx = s.cornerStickers[0]
+    stickers[idx] = stickers[idx[1:] + idx[:1]]
+    with pytest.raises(ValueError):
+        s.solve(stickers)
+
+def test_solver2x2():
+    """ The solutions of the 2x2x2 solver solve the rubik with the fewest moves """
+    s = solver2x2.getSolver2x2()
+    model = s.model
+    for seed in range(20):
+        count = seed % 6
+        stickers = scramble(model, seed, count)
+        moves = s.solve(stickers)
+        # a scramble of count commands is solved with at most count moves (half turns: one move)
+        assert len(moves) == s.distance(stickers) <= count
+        assert model.isSolved(applyCmds(model, stickers, s.solveCommands(stickers)))
+    assert s.distance(model.solved) == 0
+    assert s.distance(scramble(model, 3, 100)) <= 11
+
+def test_solver2x2_invalid_table():
+    """ An invalid distance table raises ValueError (no endless search),
+        a saved distance table with the solved state not at depth 0 is generated again """
+    s = solver2x2.getSolver2x2()
+    stickers = scramble(s.model, 3, 100)
+    moves = s.solve(stickers)
+    assert len(moves) > 0
+    bad = copy.copy(s)
+    bad.dist = memoryview(np.zeros(len(s.dist), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        bad.solve(stickers)
+
+    fileName = os.path.join(rutils.getCacheDir(), f'solver2x2_v{solver2x2.tablesVersion}_dist.npy')
+    table = np.load(fileName)
+    table[0] |= 3
+    np.save(fileName, table)
+    assert s.loadTable(fileName, 'dist') is None
+    regenerated = solver2x2.Solver2x2()
+    assert regenerated.value(0) == 0
+    assert regenerated.solve(stickers) == moves
+    assert s.loadTable(fileName, 'dist') is not None
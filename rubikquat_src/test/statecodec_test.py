@@ -0,0 +1,62 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import numpy as np
+from rubikquat_src import rubik
+from rubikquat_src import facelet
+from rubikquat_src import statecodec
+
+# ###############################################################################
+# Tests: state codec
+# ###############################################################################
+def randomStates(model, count, seed):
+    """ Return count random states (moves from solved) """
+    rng = np.random.default_rng(seed)
+    states = np.empty((count, len(model.slots)), dtype=np.uint8)
+    for i in range(count):
+        states[i] = model.applySeq(model.solved, rng.integers(0, len(model.moves), 20))
+    return states
+
+def test_round_trip():
+    """ pack/unpack, packMany/unpackMany and toInt/fromInt give back the same state """
+    for n in (2, 3, 4):
+        model = facelet.getModel(n)
+        codec = statecodec.StateCodec(model)
+        states = randomStates(model, 10, n)
+        assert (codec.unpackMany(codec.packMany(states)) == states).all()
+        for stickers in states:
+            packed = codec.pack(stickers)
+            assert len(packed) == codec.nbytes
+            assert (codec.unpack(packed) == stickers).all()
+            assert codec.fromInt(codec.toInt(packed)) == packed
+
+def test_encode_decode():
+    """ The state of a RubikData instance is encoded and decoded """
+    model = facelet.getModel(3)
+    codec = statecodec.StateCodec(model)
+    data = rubik.RubikData(model.rubikDef)
+    model.setState(data, randomStates(model, 1, 0)[0])
+    other = rubik.RubikData(model.rubikDef)
+    codec.decode(codec.encode(data), other)
+    assert (other.data == data.data).all()
+
+def test_hash():
+    """ Equal states have equal stable hashes, different states different hashes """
+    model = facelet.getModel(3)
+    codec = statecodec.StateCodec(model)
+    assert codec.nbytes == 21
+    a, b = randomStates(model, 2, 5)
+    assert codec.stableHash(codec.pack(a)) == codec.stableHash(codec.pack(a.copy()))
+    assert codec.stableHash(codec.pack(a)) != codec.stableHash(codec.pack(b))
@@ -0,0 +1,41 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import numpy as np
+from rubikquat_src import symmetry
+
+# ###############################################################################
+# Tests: canonical form of states
+# ###############################################################################
+def test_rotations():
+    """ The rotations of a state have the same canonical form """
+    sym = symmetry.getSymmetry(3)
+    model = sym.model
+    stickers = model.applySeq(model.solved, [model.moveIndex(0, 1), model.moveIndex(3, -1), model.moveIndex(1, 1)])
+    canonical = sym.canonical(stickers)
+    for frame in model.frames:
+        assert (sym.canonical(stickers[frame]) == canonical).all()
+
+def test_many():
+    """ canonicalMany gives the canonical form of every state, also in a mixed batch
+        (states with and without distinct center colors) """
+    sym = symmetry.getSymmetry(3)
+    model = sym.model
+    rng = np.random.default_rng(1)
+    states = np.array([model.applySeq(model.solved, rng.integers(0, len(model.moves), 15)) for i in range(10)])
+    states[1::2] = np.where(states[1::2] == 1, 2, states[1::2])
+    canonical = sym.canonicalMany(states)
+    for idx, stickers in enumerate(states):
+        assert (canonical[idx] == sym.canonical(stickers)).all()
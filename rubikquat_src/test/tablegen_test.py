@@ -0,0 +1,77 @@
+# This file is part of the RubikQuat distribution.
+# Copyright (c) 2020 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+import json
+import numpy as np
+from rubikquat_src import tablegen
+
+# ###############################################################################
+# Tests: pruning tables generator
+# ###############################################################################
+def moveTables(tmp_path, seed):
+    """ Save two small move tables (random permutations of coordinates for 6 moves),
+        return their file names and the pruning table generated in memory """
+    rng = np.random.default_rng(seed)
+    moveA = np.array([rng.permutation(60) for m in range(6)], dtype=np.uint16).T
+    moveB = np.array([rng.permutation(40) for m in range(6)], dtype=np.uint16).T
+    np.save(tmp_path / 'moveA.npy', moveA)
+    np.save(tmp_path / 'moveB.npy', moveB)
+    return str(tmp_path / 'moveA.npy'), str(tmp_path / 'moveB.npy'), tablegen.pruneTable(moveA, moveB)
+
+def test_pool(tmp_path):
+    """ The table generated by a pool of processes (small chunks) is the table of one process """
+    moveAName, moveBName, expected = moveTables(tmp_path, 1)
+    assert expected.max() > 3
+    single = tablegen.buildPruneTable(str(tmp_path / 'single.npy'), moveAName, moveBName, workers=1)
+    pool = tablegen.buildPruneTable(str(tmp_path / 'pool.npy'), moveAName, moveBName, workers=2, chunk=100)
+    assert (single == expected).all()
+    assert (pool == expected).all()
+    # default chunk
+    pool = tablegen.buildPruneTable(str(tmp_path / 'pool2.npy'), moveAName, moveBName, workers=3)
+    assert (pool == expected).all()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['moveA.npy', 'moveB.npy', 'pool.npy', 'pool2.npy', 'single.npy']
+
+def test_resume(tmp_path):
+    """ An interrupted generation continues from the checkpoint (.part and .ckpt) """
+    moveAName, moveBName, expected = moveTables(tmp_path, 2)
+    fileName = str(tmp_path / 'table.npy')
+    for workers in (1, 2):
+        for depth in (0, 2, int(expected.max())):
+            # the table as written until depth (the entries of depth + 1 not yet known)
+            part = np.where(expected <= depth, expected, tablegen.UNKNOWN).astype(np.uint8)
+            with open(fileName + '.part', 'wb') as f:
+                np.save(f, part)
+            with open(fileName + '.ckpt', 'w') as f:
+                json.dump({'size': len(expected), 'depth': depth}, f)
+            table = tablegen.buildPruneTable(fileName, moveAName, moveBName, workers=workers, chunk=500)
+            assert (table == expected).all()
+            del table
+    # the depths before the checkpoint are not generated again (an entry marked in .part is kept)
+    part = expected.copy()
+    mark = np.flatnonzero(expected == 1)[0]
+    part[mark] = 200
+    with open(fileName + '.part', 'wb') as f:
+        np.save(f, part)
+    with open(fileName + '.ckpt', 'w') as f:
+        json.dump({'size': len(expected), 'depth': int(expected.max())}, f)
+    assert tablegen.buildPruneTable(fileName, moveAName, moveBName, workers=1)[mark] == 200
+    # a checkpoint of other table is ignored: the table is generated again
+    with open(fileName + '.part', 'wb') as f:
+        np.save(f, np.zeros(len(expected), dtype=np.uint8))
+    with open(fileName + '.ckpt', 'w') as f:
+        json.dump({'size': 7, 'depth': 3}, f)
+    assert (tablegen.buildPruneTable(fileName, moveAName, moveBName, workers=1) == expected).all()
+    assert not (tmp_path / 'table.npy.part').exists()
+    assert not (tmp_path / 'table.npy.ckpt').exists()